@@ -0,0 +1,149 @@
+"""Extraction result cache"""
+
+import gzip
+import json
+from functools import partial
+from hashlib import file_digest, sha256
+from os import utime
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import IO, Any, cast
+
+from pdfplumber import __version__ as pdfplumber_version
+
+from cmem_plugin_pdf_extract.output import JSON_ENCODER
+
+# increase when a change of the extraction changes the results of unchanged settings
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".json.gz"
+MANIFEST_DIRECTORY = "manifest"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ResultCache:
+    """On-disk cache for extraction results.
+
+    Entries are keyed by a hash of the file content together with the effective extraction
+    settings, so that renamed or re-uploaded files with the same content are cache hits.
+    The least recently used entries are removed when the cache exceeds its maximum size.
+    The cache only holds a path and a size, so it can be passed to worker processes.
+    Entries are stored as compressed JSON, so that reading a cache directory that others can
+    write to cannot execute code.
+
+    In addition, the cache keeps a manifest of the modification timestamp, size and content
+    hash of project resources, so that unchanged resources can be looked up without
+    downloading them.
+    """
+
+    def __init__(self, directory: str | Path, max_size: int) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    @staticmethod
+    def content_hash(data: str | bytes | IO[bytes]) -> str:
+        """Hash file content given as a local path, bytes or a file positioned at the start."""
+        if isinstance(data, str):
+            with Path(data).open("rb") as f:
+                return file_digest(f, "sha256").hexdigest()
+        if isinstance(data, bytes):
+            return sha256(data).hexdigest()
+        digest = sha256()
+        for chunk in iter(partial(data.read, HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        data.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(content_hash: str, **settings: Any) -> str:  # noqa: ANN401
+        """Create the cache key of a file content hash and the extraction settings."""
+        settings_str = json.dumps(
+            {"version": CACHE_VERSION, "pdfplumber": pdfplumber_version, **settings},
+            sort_keys=True,
+            default=str,
+        )
+        return sha256(f"{content_hash}:{settings_str}".encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        """Get the path of a cache entry."""
+        return self.directory / key[:2] / f"{key}{CACHE_SUFFIX}"
+
+    def get(self, key: str) -> Any | None:  # noqa: ANN401
+        """Get a cached result or None, marking the entry as recently used."""
+        path = self.path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                value = json.load(f)
+            utime(path)
+        except (OSError, ValueError, EOFError):
+            return None
+        return value
+
+    def put(self, key: str, value: Any) -> None:  # noqa: ANN401
+        """Store a result, replacing the entry atomically."""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with (
+            NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f,
+            gzip.GzipFile(fileobj=f, mode="wb", compresslevel=1) as compressed,
+        ):
+            compressed.write(JSON_ENCODER.encode(value).encode("utf-8"))
+        Path(f.name).replace(path)
+
+    def manifest_path(self, origin: str, project_id: str, name: str) -> Path:
+        """Get the path of the manifest entry of a file by its origin, project and name."""
+        return (
+            self.directory
+            / MANIFEST_DIRECTORY
+            / f"{sha256(f'{origin}:{project_id}/{name}'.encode()).hexdigest()}.json"
+        )
+
+    def get_content_hash(
+        self, origin: str, project_id: str, name: str, resource_info: dict
+    ) -> str | None:
+        """Get the recorded content hash of a resource if it has not changed since."""
+        try:
+            path = self.manifest_path(origin, project_id, name)
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("modified") != resource_info["modified"]:
+            return None
+        if entry.get("size") != resource_info["size"]:
+            return None
+        return cast("str | None", entry.get("content_hash"))
+
+    def put_content_hash(
+        self, origin: str, project_id: str, name: str, resource_info: dict, content_hash: str
+    ) -> None:
+        """Record the modification timestamp, size and content hash of a resource."""
+        path = self.manifest_path(origin, project_id, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "origin": origin,
+            "project_id": project_id,
+            "name": name,
+            "modified": resource_info["modified"],
+            "size": resource_info["size"],
+            "content_hash": content_hash,
+        }
+        with NamedTemporaryFile(
+            "w", dir=path.parent, suffix=".tmp", delete=False, encoding="utf-8"
+        ) as f:
+            json.dump(entry, f)
+        Path(f.name).replace(path)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits its maximum size."""
+        entries = []
+        for path in self.directory.glob(f"*/*{CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
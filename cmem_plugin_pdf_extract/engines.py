@@ -0,0 +1,198 @@
+"""Extraction engines that open PDF documents and extract their pages"""
+
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from threading import Lock
+from types import TracebackType
+from typing import IO, Any, Protocol, Self
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from pdfplumber import open as pdfplumber_open
+
+from cmem_plugin_pdf_extract.page_extractor import (
+    IMAGE_ONLY_MIN_COVERAGE,
+    PageExtractor,
+    image_coverage,
+)
+from cmem_plugin_pdf_extract.utils import memory_map
+
+ENGINE_PDFPLUMBER = "pdfplumber"
+ENGINE_PDFIUM = "pdfium"
+
+# PDFium is not thread-safe, not even for different documents, so all calls are serialized
+PDFIUM_LOCK = Lock()
+
+
+class EnginePage(Protocol):
+    """The extraction interface of a page, as implemented by PageExtractor."""
+
+    table_detection_skipped: bool
+
+    def is_image_only(self) -> bool:
+        """Check whether the page has no characters and is mostly covered by images."""
+
+    def extract_text(self, **kwargs: Any) -> str:  # noqa: ANN401
+        """Extract the text of the page."""
+
+    def extract_tables(self, table_settings: dict | None = None) -> list[list[list[str | None]]]:
+        """Extract the tables of the page."""
+
+    def close(self) -> None:
+        """Release the resources of the page."""
+
+
+class EngineDocument(ABC):
+    """A PDF document opened by an extraction engine.
+
+    The pages are extracted through the interface of PageExtractor, so that the errors,
+    warnings and statistics of the pages are handled alike for all engines.
+    """
+
+    metadata: dict
+    page_count: int
+
+    @abstractmethod
+    def __init__(self, source: str | IO[bytes], text_only: bool = False) -> None:
+        """Open a document from a local path or a seekable binary file.
+
+        If text_only is set, the tables are not extracted.
+        """
+
+    @abstractmethod
+    def page(self, page_number: int) -> EnginePage:
+        """Get the extractor of a page by its number, starting at 1."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Close the document."""
+
+    def __enter__(self) -> Self:
+        """Return the document as context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the document when leaving the context."""
+        self.close()
+
+
+class PdfplumberDocument(EngineDocument):
+    """Extract the text and the tables of a document with pdfplumber.
+
+    All text and table extraction settings are supported.
+    """
+
+    def __init__(self, source: str | IO[bytes], text_only: bool = False) -> None:
+        self.text_only = text_only
+        with ExitStack() as stack:
+            # pdfplumber reads from any seekable binary stream, including memory maps
+            binary_file = (
+                source if isinstance(source, str) else stack.enter_context(memory_map(source))
+            )
+            self.pdf = pdfplumber_open(binary_file)  # type: ignore[arg-type]
+            self.stack = stack.pop_all()
+        self.metadata = self.pdf.metadata or {}
+        self.page_count = len(self.pdf.pages)
+
+    def page(self, page_number: int) -> PageExtractor:
+        """Get the extractor of a page, sharing a single layout pass for text and tables."""
+        return PageExtractor(self.pdf.pages[page_number - 1], text_only=self.text_only)
+
+    def close(self) -> None:
+        """Close the document and its memory map, if any."""
+        self.pdf.close()
+        self.stack.close()
+
+
+class PdfiumPage:
+    """Extract the text of a page with PDFium, without tables.
+
+    The text is extracted in the reading order of PDFium, with the line breaks normalized to
+    those of pdfplumber. The text extraction settings are not used.
+    """
+
+    def __init__(self, page: pdfium.PdfPage) -> None:
+        self.page = page
+        self.table_detection_skipped = False
+
+    def is_image_only(self) -> bool:
+        """Check whether the page has no characters and is mostly covered by images."""
+        with PDFIUM_LOCK:
+            textpage = self.page.get_textpage()
+            try:
+                if textpage.count_chars():
+                    return False
+            finally:
+                textpage.close()
+            images = [
+                obj.get_bounds()
+                for obj in self.page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE])
+            ]
+            page_bbox = (0, 0, *self.page.get_size())
+        return image_coverage(images, page_bbox) >= IMAGE_ONLY_MIN_COVERAGE
+
+    def extract_text(self, **_: Any) -> str:  # noqa: ANN401
+        """Extract the text of the page."""
+        with PDFIUM_LOCK:
+            textpage = self.page.get_textpage()
+            try:
+                text = textpage.get_text_bounded()
+            finally:
+                textpage.close()
+        # PDFium ends lines with CRLF and keeps the spaces before line breaks
+        return "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").split("\n"))
+
+    def extract_tables(self, table_settings: dict | None = None) -> list[list[list[str | None]]]:  # noqa: ARG002
+        """Skip the table detection, since PDFium does not detect tables."""
+        self.table_detection_skipped = True
+        return []
+
+    def close(self) -> None:
+        """Close the page."""
+        with PDFIUM_LOCK:
+            self.page.close()
+
+
+class PdfiumDocument(EngineDocument):
+    """Extract the text of a document with PDFium, a native library.
+
+    The text extraction is considerably faster than with pdfplumber, but tables are not
+    extracted and the text extraction settings are not used.
+    """
+
+    def __init__(self, source: str | IO[bytes], text_only: bool = False) -> None:  # noqa: ARG002
+        with PDFIUM_LOCK:
+            self.pdf = pdfium.PdfDocument(source)
+            try:
+                # missing entries are returned as empty strings, pdfplumber leaves them out
+                self.metadata = {k: v for k, v in self.pdf.get_metadata_dict().items() if v}
+                self.page_count = len(self.pdf)
+            except Exception:
+                self.pdf.close()
+                raise
+
+    def page(self, page_number: int) -> PdfiumPage:
+        """Get the extractor of a page."""
+        with PDFIUM_LOCK:
+            return PdfiumPage(self.pdf[page_number - 1])
+
+    def close(self) -> None:
+        """Close the document."""
+        with PDFIUM_LOCK:
+            self.pdf.close()
+
+
+ENGINES: dict[str, type[EngineDocument]] = {
+    ENGINE_PDFPLUMBER: PdfplumberDocument,
+    ENGINE_PDFIUM: PdfiumDocument,
+}
+
+
+def open_document(engine: str, source: str | IO[bytes], text_only: bool = False) -> EngineDocument:
+    """Open a document from a local path or a seekable binary file with an engine."""
+    return ENGINES[engine](source, text_only=text_only)
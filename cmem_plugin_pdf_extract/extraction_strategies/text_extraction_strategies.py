@@ -93,9 +93,34 @@ RAW_TEXT_EXTRACTION = {
     "split_at_punctuation": False,
 }
 
+# -----------------------------------------------------------------
+# Text Only (Fast full-text extraction without tables)
+# -----------------------------------------------------------------
+TEXT_ONLY_EXTRACTION = {
+    # Engine
+    "text_only": True,  # Collect chars from pdfminer directly, skip tables
+    # Text Merging (Same as default)
+    "x_tolerance": 1,
+    "y_tolerance": 1,
+    # Spatial Analysis (Same as default)
+    "x_density": 7.25,
+    "y_density": 13,
+    # Layout Control (Same as default)
+    "layout": False,
+    # Text Handling (Same as default)
+    "keep_blank_chars": False,
+    "use_text_flow": False,
+    "horizontal_ltr": True,
+    "vertical_ttb": True,
+    # Metadata
+    "extra_attrs": [],
+    "split_at_punctuation": False,
+}
+
 TEXT_EXTRACTION_STRATEGIES = {
     "default": DEFAULT_TEXT_EXTRACTION,
     "raw": RAW_TEXT_EXTRACTION,
     "scanned": SCANNED_TEXT_EXTRACTION,
     "layout": LAYOUT_AWARE_EXTRACTION,
+    "text_only": TEXT_ONLY_EXTRACTION,
 }
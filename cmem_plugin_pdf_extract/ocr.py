@@ -0,0 +1,74 @@
+"""Optical character recognition of image-only pages with Tesseract"""
+
+import re
+import subprocess
+from os import close
+from tempfile import mkstemp
+from typing import IO
+
+import pypdfium2 as pdfium
+
+from cmem_plugin_pdf_extract.engines import PDFIUM_LOCK
+
+# Tesseract is looked up on the PATH of the plugin process
+OCR_COMMAND = "tesseract"
+OCR_LANGUAGE_DEFAULT = "eng"
+# Tesseract recognizes text best at about 300 DPI
+OCR_DPI = 300
+OCR_TIMEOUT = 600
+# one or more Tesseract language codes, e.g. "eng" or "deu+eng"
+OCR_LANGUAGE_PATTERN = re.compile(r"[A-Za-z0-9_]+(\+[A-Za-z0-9_]+)*")
+
+
+def render_pages(
+    source: str | IO[bytes], page_numbers: list[int], dpi: int, directory: str | None = None
+) -> dict[int, str]:
+    """Render pages of a document as grayscale PNG images with PDFium.
+
+    The images are written to temporary files in the directory and their paths are returned
+    by page number, so that the images are not passed between processes.
+    """
+    images = {}
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            for page_number in page_numbers:
+                page = pdf[page_number - 1]
+                fd, path = mkstemp(suffix=".png", dir=directory)
+                close(fd)
+                images[page_number] = path
+                try:
+                    bitmap = page.render(scale=dpi / 72, grayscale=True)
+                    bitmap.to_pil().save(path, "PNG", dpi=(dpi, dpi))
+                    bitmap.close()
+                finally:
+                    page.close()
+        finally:
+            pdf.close()
+    if not isinstance(source, str):
+        source.seek(0)
+    return images
+
+
+def recognize(image_path: str, language: str) -> str:
+    """Recognize the text of a page image file by running Tesseract as a subprocess.
+
+    The text is read from stdout, so that no output file is needed.
+    """
+    try:
+        process = subprocess.run(  # noqa: S603
+            [OCR_COMMAND, image_path, "stdout", "-l", language],
+            capture_output=True,
+            timeout=OCR_TIMEOUT,
+            check=False,
+        )
+    except FileNotFoundError as e:
+        raise RuntimeError(f"OCR failed: {OCR_COMMAND} is not installed") from e
+    except subprocess.TimeoutExpired as e:
+        raise RuntimeError(f"OCR timed out after {OCR_TIMEOUT} seconds") from e
+    if process.returncode:
+        stderr = process.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"OCR failed with exit code {process.returncode}: {stderr}")
+    text = process.stdout.decode("utf-8", errors="replace")
+    # Tesseract ends each page with a form feed and keeps spaces before line breaks
+    return "\n".join(line.rstrip() for line in text.replace("\f", "").splitlines()).strip("\n")
@@ -0,0 +1,164 @@
+"""Serialization of extraction results"""
+
+import json
+from collections.abc import Callable, Iterable, Iterator
+from importlib import import_module
+from tempfile import SpooledTemporaryFile, TemporaryFile
+
+from cmem.cmempy.workspace.projects.resources.resource import create_resource
+
+PARQUET_SUFFIX = ".parquet"
+ARROW_SUFFIX = ".arrow"
+TABLE_OUTPUT_SUFFIXES = (PARQUET_SUFFIX, ARROW_SUFFIX)
+
+# the C encoder of the standard library is used for compact output without indentation
+JSON_ENCODER = json.JSONEncoder(
+    ensure_ascii=False, check_circular=False, separators=(",", ":"), default=str
+)
+
+
+def to_json(value: dict | list) -> str:
+    """Serialize a file result or a list of file results to a JSON document."""
+    return JSON_ENCODER.encode(value)
+
+
+def iter_json_lines(results: Iterable[dict]) -> Iterator[str]:
+    """Yield the JSON Lines of file results.
+
+    Each file is written as a line with its metadata, followed by a line per page. The page
+    lines include the file name, so that they can be processed independently.
+    """
+    for result in results:
+        metadata = result["metadata"]
+        yield f"{JSON_ENCODER.encode({'metadata': metadata})}\n"
+        for page in result["pages"]:
+            yield f"{JSON_ENCODER.encode({'Filename': metadata['Filename'], **page})}\n"
+
+
+class SpooledOutput:
+    """Serialize file results one after another into a spooled temporary file.
+
+    The results are written as soon as they are available, so that only their serialization
+    is kept, in memory up to max_size characters and in a temporary file above that. The
+    output is read back as a single string, so it needs memory of its full size at the end.
+    """
+
+    def __init__(
+        self,
+        serialize: Callable[[dict], str],
+        start: str = "",
+        separator: str = "",
+        end: str = "",
+        max_size: int = 0,
+    ) -> None:
+        self.serialize = serialize
+        self.separator = separator
+        self.end = end
+        self.count = 0
+        self.file = SpooledTemporaryFile(max_size=max_size, mode="w+", encoding="utf-8")  # noqa: SIM115
+        self.file.write(start)
+
+    def write(self, result: dict) -> None:
+        """Serialize and write a file result."""
+        if self.count:
+            self.file.write(self.separator)
+        self.file.write(self.serialize(result))
+        self.count += 1
+
+    def getvalue(self) -> str:
+        """Finish the output and read it back."""
+        self.file.write(self.end)
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self) -> None:
+        """Close and remove the temporary file."""
+        self.file.close()
+
+
+class ResourceOutput:
+    """Write file results as JSON Lines to a project resource.
+
+    The lines are written to a temporary file on disk as soon as the results are available,
+    and uploaded as a stream once all files have been processed, so that neither the results
+    nor their serialization are kept in memory.
+    """
+
+    def __init__(self, project_id: str, resource_name: str) -> None:
+        self.project_id = project_id
+        self.resource_name = resource_name
+        self.files = 0
+        self.pages = 0
+        self.errors = 0
+        self.file = TemporaryFile()  # noqa: SIM115
+
+    def write(self, result: dict) -> None:
+        """Serialize and write a file result, counting its pages and errors."""
+        self.write_result(result)
+        self.files += 1
+        self.pages += len(result["pages"])
+        self.errors += ("error" in result["metadata"]) + sum(
+            "error" in page for page in result["pages"]
+        )
+
+    def write_result(self, result: dict) -> None:
+        """Serialize and write a file result to the temporary file."""
+        for line in iter_json_lines([result]):
+            self.file.write(line.encode("utf-8"))
+
+    def finish(self) -> None:
+        """Finish the content of the temporary file before it is uploaded."""
+
+    def upload(self) -> None:
+        """Upload the written content to the project resource, replacing it if it exists."""
+        self.finish()
+        self.file.seek(0)
+        create_resource(self.project_id, self.resource_name, file_resource=self.file, replace=True)
+
+    def close(self) -> None:
+        """Close and remove the temporary file."""
+        self.file.close()
+
+
+class TableResourceOutput(ResourceOutput):
+    """Write the table rows of file results as a Parquet or Arrow file to a project resource.
+
+    Each row has the columns file, page, table_idx, row_idx and cells, a list of the cell
+    strings. The rows of each file result are written as a separate record batch, so that the
+    output is built incrementally. Requires the optional pyarrow package.
+    """
+
+    def __init__(self, project_id: str, resource_name: str) -> None:
+        super().__init__(project_id, resource_name)
+        self.pa = import_module("pyarrow")
+        self.schema = self.pa.schema(
+            [
+                ("file", self.pa.string()),
+                ("page", self.pa.int32()),
+                ("table_idx", self.pa.int32()),
+                ("row_idx", self.pa.int32()),
+                ("cells", self.pa.list_(self.pa.string())),
+            ]
+        )
+        if resource_name.endswith(PARQUET_SUFFIX):
+            self.writer = import_module("pyarrow.parquet").ParquetWriter(self.file, self.schema)
+        else:
+            self.writer = self.pa.ipc.new_file(self.file, self.schema)
+
+    def write_result(self, result: dict) -> None:
+        """Write the table rows of a file result as a record batch."""
+        columns: dict[str, list] = {name: [] for name in self.schema.names}
+        for page in result["pages"]:
+            for table_idx, table in enumerate(page.get("tables", []), start=1):
+                for row_idx, row in enumerate(table, start=1):
+                    columns["file"].append(result["metadata"]["Filename"])
+                    columns["page"].append(page["page_number"])
+                    columns["table_idx"].append(table_idx)
+                    columns["row_idx"].append(row_idx)
+                    columns["cells"].append(row)
+        if columns["file"]:
+            self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def finish(self) -> None:
+        """Write the footer of the file."""
+        self.writer.close()
@@ -0,0 +1,314 @@
+"""Combined text and table extraction of a page"""
+
+from collections.abc import Iterable
+from inspect import signature
+from typing import Any
+
+from pdfminer.pdfcolor import PDFColorSpace
+from pdfminer.pdfdevice import PDFTextDevice
+from pdfminer.pdffont import PDFFont, PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFGraphicState, PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdftypes import PDFStream
+from pdfminer.utils import MATRIX_IDENTITY, Matrix, apply_matrix_rect
+from pdfplumber.page import Page, tuplify_list_kwargs
+from pdfplumber.table import (
+    Table,
+    TableFinder,
+    TableSettings,
+)
+from pdfplumber.utils import extract_text, filter_edges, obj_to_edges
+from pdfplumber.utils.exceptions import PdfminerException
+from pdfplumber.utils.text import (
+    TEXTMAP_KWARGS,
+    WORD_EXTRACTOR_KWARGS,
+    WordExtractor,
+)
+
+WORD_EXTRACTOR_DEFAULTS = {
+    name: parameter.default for name, parameter in signature(WordExtractor).parameters.items()
+}
+# a page without characters is image-only if images cover at least this fraction of it
+IMAGE_ONLY_MIN_COVERAGE = 0.5
+
+
+def image_coverage(bboxes: Iterable[tuple[float, float, float, float]], page_bbox: tuple) -> float:
+    """Get the fraction of a page covered by images, at most 1.
+
+    The bounding boxes are clipped to the page, but overlapping images are counted repeatedly.
+    """
+    x0, y0, x1, y1 = page_bbox
+    area = sum(
+        max(min(right, x1) - max(left, x0), 0) * max(min(bottom, y1) - max(top, y0), 0)
+        for left, top, right, bottom in bboxes
+    )
+    page_area = (x1 - x0) * (y1 - y0)
+    return min(area / page_area, 1) if page_area else 0
+
+
+def word_settings(kwargs: dict) -> dict | None:
+    """Resolve the effective word extraction settings, or None if they are not all known."""
+    if not set(kwargs).issubset(WORD_EXTRACTOR_KWARGS):
+        return None
+    return {**WORD_EXTRACTOR_DEFAULTS, **tuplify_list_kwargs(kwargs)}
+
+
+class CharCollector(PDFTextDevice):
+    """Collect the characters of a page with only the attributes needed to extract its text.
+
+    The positions are computed as by pdfminer and pdfplumber, but the characters are neither
+    created as pdfminer layout objects nor converted to pdfplumber objects with all of their
+    attributes, such as fonts and colors. The bounding boxes of the images are collected
+    as well, to detect image-only pages.
+    """
+
+    def __init__(self, rsrcmgr: PDFResourceManager, page: Page) -> None:
+        super().__init__(rsrcmgr)
+        self.height = page.height
+        self.mediabox_x0, self.mediabox_top = page.mediabox[:2]
+        self.initial_doctop = page.initial_doctop
+        self.chars: list[dict] = []
+        self.images: list[tuple[float, float, float, float]] = []
+
+    def render_char(  # noqa: PLR0913
+        self,
+        matrix: Matrix,
+        font: PDFFont,
+        fontsize: float,
+        scaling: float,
+        rise: float,
+        cid: int,
+        ncs: PDFColorSpace,  # noqa: ARG002
+        graphicstate: PDFGraphicState,  # noqa: ARG002
+    ) -> float:
+        """Collect a character, returning its advance as LTChar does."""
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            text = f"(cid:{cid})"
+        adv: float = font.char_width(cid) * fontsize * scaling
+        if font.is_vertical():
+            vx, vy = font.char_disp(cid)  # type: ignore[misc]
+            vx = fontsize * 0.5 if vx is None else vx * fontsize * 0.001
+            vy = (1000 - vy) * fontsize * 0.001
+            bbox = (-vx, vy + rise + adv, -vx + fontsize, vy + rise)
+        else:
+            descent = font.get_descent() * fontsize
+            bbox = (0, descent + rise, adv, descent + rise + fontsize)
+        a, b, c, d, _, _ = matrix
+        x0, y0, x1, y1 = apply_matrix_rect(matrix, bbox)
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        top = self.height - y1 + self.mediabox_top
+        self.chars.append(
+            {
+                "text": text,
+                "x0": x0 + self.mediabox_x0,
+                "x1": x1 + self.mediabox_x0,
+                "top": top,
+                "bottom": self.height - y0 + self.mediabox_top,
+                "doctop": self.initial_doctop + top,
+                "upright": a * d * scaling > 0 and b * c <= 0,
+                # the attributes that the layout-aware preset groups the characters by
+                "fontname": font.fontname,
+                "size": x1 - x0 if font.is_vertical() else y1 - y0,
+            }
+        )
+        return adv
+
+    def render_image(self, name: str, stream: PDFStream) -> None:  # noqa: ARG002
+        """Collect the bounding box of an image, which is drawn into the unit square."""
+        x0, y0, x1, y1 = apply_matrix_rect(self.ctm or MATRIX_IDENTITY, (0, 0, 1, 1))
+        self.images.append(
+            (
+                min(x0, x1) + self.mediabox_x0,
+                self.height - max(y0, y1) + self.mediabox_top,
+                max(x0, x1) + self.mediabox_x0,
+                self.height - min(y0, y1) + self.mediabox_top,
+            )
+        )
+
+
+class PageExtractor:
+    """Extract the text and the tables of a page from a single layout pass.
+
+    The results are identical to those of Page.extract_text and Page.extract_tables, but
+    - the words clustered for the text are reused by the text table strategy if the word
+      settings match,
+    - the character midpoints are computed once per page, and the characters are assigned
+      to each table before they are assigned to its rows and cells, instead of scanning all
+      characters of the page for every table row,
+    - the table detection is skipped if the page does not have enough edges for a table.
+
+    If text_only is set, the characters for the text are collected directly from the
+    pdfminer interpreter by a CharCollector, and the table detection is always skipped.
+
+    Pages without characters that are mostly covered by images are image-only, e.g. scans
+    without a text layer, which can be skipped without extracting their text and tables.
+    """
+
+    def __init__(self, page: Page, text_only: bool = False) -> None:
+        self.page = page
+        self.text_only = text_only
+        self.words: list[dict] | None = None
+        self.word_settings: dict | None = None
+        self.table_detection_skipped = False
+        self._char_midpoints: list[tuple[float, float, dict]] | None = None
+        self._collector: CharCollector | None = None
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Delegate to the page, since the table finder accesses it through the extractor."""
+        return getattr(self.page, name)
+
+    @property
+    def char_midpoints(self) -> list[tuple[float, float, dict]]:
+        """Get the vertical and horizontal midpoints of the characters of the page."""
+        if self._char_midpoints is None:
+            self._char_midpoints = [
+                ((char["top"] + char["bottom"]) / 2, (char["x0"] + char["x1"]) / 2, char)
+                for char in self.page.chars
+            ]
+        return self._char_midpoints
+
+    def close(self) -> None:
+        """Release the layout and objects of the page, which pdfplumber keeps otherwise."""
+        self.page.close()
+
+    @property
+    def collector(self) -> CharCollector:
+        """Collect the characters and images of the page without the pdfplumber objects."""
+        if self._collector is None:
+            device = CharCollector(self.page.pdf.rsrcmgr, self.page)
+            interpreter = PDFPageInterpreter(self.page.pdf.rsrcmgr, device)
+            try:
+                interpreter.process_page(self.page.page_obj)
+            except Exception as e:
+                raise PdfminerException(e) from e
+            self._collector = device
+        return self._collector
+
+    def is_image_only(self) -> bool:
+        """Check whether the page has no characters and is mostly covered by images."""
+        if self.text_only:
+            chars, images = self.collector.chars, self.collector.images
+        else:
+            chars = self.page.chars
+            images = [
+                (image["x0"], image["top"], image["x1"], image["bottom"])
+                for image in self.page.images
+            ]
+        return not chars and image_coverage(images, self.page.bbox) >= IMAGE_ONLY_MIN_COVERAGE
+
+    def extract_text(self, **kwargs: Any) -> str:  # noqa: ANN401
+        """Extract the text of the page, keeping its words for the table extraction."""
+        kwargs = tuplify_list_kwargs(kwargs)
+        page = self.page
+        chars = self.collector.chars if self.text_only else page.chars
+        defaults: dict[str, Any] = {"layout_bbox": page.bbox}
+        if "layout_width_chars" not in kwargs:
+            defaults["layout_width"] = page.width
+        if "layout_height_chars" not in kwargs:
+            defaults["layout_height"] = page.height
+        full_kwargs = {**defaults, **kwargs, "presorted": True}
+        extractor = WordExtractor(
+            **{k: full_kwargs[k] for k in WORD_EXTRACTOR_KWARGS if k in full_kwargs}
+        )
+        wordmap = extractor.extract_wordmap(chars)
+        self.words = [word for word, _ in wordmap.tuples]
+        self.word_settings = word_settings(
+            {k: kwargs[k] for k in WORD_EXTRACTOR_KWARGS if k in kwargs}
+        )
+        textmap = wordmap.to_textmap(
+            **{k: full_kwargs[k] for k in TEXTMAP_KWARGS if k in full_kwargs}
+        )
+        return textmap.as_string
+
+    def extract_words(self, **kwargs: Any) -> list[dict]:  # noqa: ANN401
+        """Extract the words of the page, reusing the words of the text if possible."""
+        if self.words is not None and word_settings(kwargs) == self.word_settings:
+            return self.words
+        return self.page.extract_words(**kwargs)
+
+    def extract_tables(self, table_settings: dict | None = None) -> list[list[list[str | None]]]:
+        """Extract the tables of the page."""
+        settings = TableSettings.resolve(table_settings)
+        if self.text_only or not self.may_contain_tables(settings):
+            self.table_detection_skipped = True
+            return []
+        tables = TableFinder(self, settings).tables  # type: ignore[arg-type]
+        return [self.extract_table(table, **(settings.text_settings or {})) for table in tables]
+
+    def may_contain_tables(self, settings: TableSettings) -> bool:
+        """Check cheaply whether the table finder can find any table on the page.
+
+        A table cell is bounded by at least two vertical and two horizontal edges. The edges
+        are counted before they are snapped, joined and filtered by length, which never
+        increases their number. Explicit strategies are always detected, so that missing
+        explicit lines raise the same error as before.
+        """
+        if "explicit" in (settings.vertical_strategy, settings.horizontal_strategy):
+            return True
+        return all(
+            self.count_edges(settings, orientation) >= 2  # noqa: PLR2004
+            for orientation in ("vertical", "horizontal")
+        )
+
+    def count_edges(self, settings: TableSettings, orientation: str) -> int:
+        """Count the edges of an orientation the table finder starts from, or more."""
+        # objects given as explicit lines are counted with the edges of all orientations
+        count = sum(
+            len(obj_to_edges(desc)) if isinstance(desc, dict) else 1
+            for desc in getattr(settings, f"explicit_{orientation}_lines") or []
+        )
+        strategy = getattr(settings, f"{orientation}_strategy")
+        if strategy in ("lines", "lines_strict"):
+            count += len(
+                filter_edges(
+                    self.page.edges,
+                    orientation[0],
+                    edge_type="line" if strategy == "lines_strict" else None,
+                    min_length=settings.edge_min_length_prefilter,
+                )
+            )
+        elif strategy == "text":
+            # words_to_edges_* only derive edges from groups of at least this many words,
+            # every group yielding at least two edges
+            threshold = getattr(settings, f"min_words_{orientation}")
+            words = self.extract_words(**(settings.text_settings or {}))
+            if words and len(words) >= threshold:
+                count += 2
+        return count
+
+    def extract_table(self, table: Table, **kwargs: Any) -> list[list[str | None]]:  # noqa: ANN401
+        """Extract the cell text of a table, as Table.extract does."""
+
+        def in_bbox(v_mid: float, h_mid: float, bbox: tuple) -> bool:
+            x0, top, x1, bottom = bbox
+            return bool((h_mid >= x0) and (h_mid < x1) and (v_mid >= top) and (v_mid < bottom))
+
+        # rows and cells lie within the table, so no character outside of it can be part of them
+        table_bbox = table.bbox
+        table_chars = [
+            item for item in self.char_midpoints if in_bbox(item[0], item[1], table_bbox)
+        ]
+        table_arr = []
+        for row in table.rows:
+            row_bbox = row.bbox
+            row_chars = [item for item in table_chars if in_bbox(item[0], item[1], row_bbox)]
+            arr: list[str | None] = []
+            for cell in row.cells:
+                if cell is None:
+                    arr.append(None)
+                    continue
+                cell_chars = [
+                    char for v_mid, h_mid, char in row_chars if in_bbox(v_mid, h_mid, cell)
+                ]
+                if not cell_chars:
+                    arr.append("")
+                    continue
+                if "layout" in kwargs:
+                    kwargs["layout_width"] = cell[2] - cell[0]
+                    kwargs["layout_height"] = cell[3] - cell[1]
+                    kwargs["layout_bbox"] = cell
+                arr.append(extract_text(cell_chars, **kwargs))
+            table_arr.append(arr)
+        return table_arr
@@ -1,16 +1,30 @@
 """Extract text from PDF files"""
 
 import re
-from collections import OrderedDict
-from collections.abc import Sequence
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, OrderedDict, deque
+from collections.abc import Callable, Generator, Iterator, Sequence
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import ExitStack, closing, contextmanager
+from functools import partial
+from importlib.util import find_spec
 from io import BytesIO
-from os import cpu_count
-from typing import Any
+from itertools import islice, repeat
+from multiprocessing import get_all_start_methods, get_context
+from os import cpu_count, environ
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import IO, Any, cast
+from urllib.parse import quote
 
 import yaml
 from cmem.cmempy.workspace.projects.resources import get_resources
-from cmem.cmempy.workspace.projects.resources.resource import get_resource
 from cmem_plugin_base.dataintegration.context import (
     ExecutionContext,
     ExecutionReport,
@@ -24,15 +38,22 @@ from cmem_plugin_base.dataintegration.plugins import WorkflowPlugin
 from cmem_plugin_base.dataintegration.ports import FixedNumberOfInputs, FixedSchemaPort
 from cmem_plugin_base.dataintegration.typed_entities.file import FileEntitySchema
 from cmem_plugin_base.dataintegration.types import (
+    BoolParameterType,
     IntParameterType,
     StringParameterType,
 )
 from cmem_plugin_base.dataintegration.utils import setup_cmempy_user_access
-from pdfplumber import open as pdfplumber_open
-from pdfplumber.page import Page
 from yaml import YAMLError, safe_load
 
+from cmem_plugin_pdf_extract.cache import ResultCache
 from cmem_plugin_pdf_extract.doc import DOC
+from cmem_plugin_pdf_extract.engines import (
+    ENGINE_PDFIUM,
+    ENGINE_PDFPLUMBER,
+    EngineDocument,
+    EnginePage,
+    open_document,
+)
 from cmem_plugin_pdf_extract.extraction_strategies.table_extraction_strategies import (
     LINES_STRATEGY,
     TABLE_EXTRACTION_STRATEGIES,
@@ -41,20 +62,66 @@ from cmem_plugin_pdf_extract.extraction_strategies.text_extraction_strategies im
     DEFAULT_TEXT_EXTRACTION,
     TEXT_EXTRACTION_STRATEGIES,
 )
+from cmem_plugin_pdf_extract.ocr import (
+    OCR_DPI,
+    OCR_LANGUAGE_DEFAULT,
+    OCR_LANGUAGE_PATTERN,
+    recognize,
+    render_pages,
+)
+from cmem_plugin_pdf_extract.output import (
+    TABLE_OUTPUT_SUFFIXES,
+    ResourceOutput,
+    SpooledOutput,
+    TableResourceOutput,
+    iter_json_lines,
+    to_json,
+)
+from cmem_plugin_pdf_extract.stats import (
+    STATS_BYTES,
+    STATS_IMAGE_ONLY_PAGES,
+    STATS_OCR_PAGES,
+    STATS_PAGES,
+    STATS_REORDER_BUFFER,
+    STATS_TABLE_DETECTION_SKIPPED,
+    STATS_TIME_DOWNLOAD,
+    STATS_TIME_FILE,
+    STATS_TIME_OCR,
+    STATS_TIME_OPEN,
+    STATS_TIME_PROBE,
+    STATS_TIME_RENDER,
+    STATS_TIME_SERIALIZATION,
+    STATS_TIME_TABLES,
+    STATS_TIME_TEXT,
+    RunStatistics,
+    source_size,
+    timer,
+)
+from cmem_plugin_pdf_extract.strategy_probe import AUTO_STRATEGY, is_auto, resolve_strategies
 from cmem_plugin_pdf_extract.utils import (
     capture_pdfminer_logs,
     parse_page_selection,
+    set_environment,
+    spool_resource,
     validate_page_selection,
 )
 
 MAX_PROCESSES_DEFAULT = cpu_count() - 1  # type: ignore[operator]
+CACHE_MAX_SIZE_DEFAULT = 1024
+# project resources larger than this are spooled to a temporary file instead of memory
+SPOOL_THRESHOLD = 32 * 1024 * 1024
+# worker processes are not forked from the threads of the plugin process
+WORKER_START_METHOD = "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
+IN_FLIGHT_FILES_PER_PROCESS = 2
 TABLE_LINES = "lines"
 TABLE_TEXT = "text"
 TABLE_LATTICE = "lattice"
 TABLE_SPARSE = "sparse"
 TABLE_CUSTOM = "custom"
+TABLE_AUTO = "auto"
 TABLE_STRATEGY_PARAMETER_CHOICES = OrderedDict(
     {
+        TABLE_AUTO: "Automatic",
         TABLE_LINES: "Lines",
         TABLE_TEXT: "Text",
         TABLE_LATTICE: "Lattice",
@@ -67,16 +134,22 @@ TEXT_DEFAULT = "default"
 TEXT_RAW = "raw"
 TEXT_SCANNED = "scanned"
 TEXT_LAYOUT = "layout"
+TEXT_ONLY = "text_only"
 TEXT_CUSTOM = "custom"
+TEXT_AUTO = "auto"
 TEXT_STRATEGY_PARAMETER_CHOICES = OrderedDict(
     {
+        TEXT_AUTO: "Automatic",
         TEXT_DEFAULT: "Default",
         TEXT_RAW: "Raw",
         TEXT_SCANNED: "Scanned",
         TEXT_LAYOUT: "Layout",
+        TEXT_ONLY: "Text only (fast)",
         TEXT_CUSTOM: "Custom",
     }
 )
+# text extraction setting to collect the characters directly from pdfminer without tables
+TEXT_ONLY_SETTING = "text_only"
 
 IGNORE = "ignore"
 RAISE_ON_ERROR = "raise_on_error"
@@ -93,6 +166,48 @@ COMBINE = "combine"
 NO_COMBINE = "no_combine"
 COMBINE_PARAMETER_CHOICES = OrderedDict({COMBINE: "Combine", NO_COMBINE: "Don't combine"})
 
+ENGINE_PARAMETER_CHOICES = OrderedDict(
+    {
+        ENGINE_PDFPLUMBER: "pdfplumber",
+        ENGINE_PDFIUM: "PDFium (fast, text only)",
+    }
+)
+
+EXECUTOR_THREADS = "threads"
+EXECUTOR_PROCESSES = "processes"
+EXECUTOR_PARAMETER_CHOICES = OrderedDict(
+    {
+        EXECUTOR_THREADS: "Threads",
+        EXECUTOR_PROCESSES: "Processes",
+    }
+)
+
+OUTPUT_FORMAT_PYTHON = "python"
+OUTPUT_FORMAT_JSON = "json"
+OUTPUT_FORMAT_JSONL = "jsonl"
+OUTPUT_FORMAT_PARAMETER_CHOICES = OrderedDict(
+    {
+        OUTPUT_FORMAT_PYTHON: "Python literal",
+        OUTPUT_FORMAT_JSON: "JSON",
+        OUTPUT_FORMAT_JSONL: "JSON Lines",
+    }
+)
+
+OUTPUT_MODE_FILE = "file"
+OUTPUT_MODE_PAGE = "page"
+OUTPUT_MODE_TABLE_ROW = "table_row"
+OUTPUT_MODE_PARAMETER_CHOICES = OrderedDict(
+    {
+        OUTPUT_MODE_FILE: "One entity per file",
+        OUTPUT_MODE_PAGE: "One entity per page",
+        OUTPUT_MODE_TABLE_ROW: "One entity per table row",
+    }
+)
+PAGE_SCHEMA_PATHS = ["filename", "page_number", "text", "tables", "error"]
+TABLE_ROW_SCHEMA_PATHS = ["filename", "page_number", "table_index", "row_index", "cells"]
+TABLE_COLUMNS_DEFAULT = 10
+RESOURCE_SCHEMA_PATHS = ["output_resource", "files", "pages", "errors"]
+
 TYPE_URI = "urn:x-eccenca:PdfExtract"
 
 
@@ -125,9 +240,55 @@ TYPE_URI = "urn:x-eccenca:PdfExtract"
             label="Combine the results from all files into a single value",
             description="""If set to 'Combine', the results of all files will be combined into a
             single output value. If set to 'Don't combine', each file result will be output in a
-            separate entity.""",
+            separate entity. The combined value is held in memory as a whole, use an output file
+            for large numbers of files.""",
             default_value=NO_COMBINE,
         ),
+        PluginParameter(
+            param_type=ChoiceParameterType(OUTPUT_FORMAT_PARAMETER_CHOICES),
+            name="output_format",
+            label="Output format",
+            description="""The format of the output values. "Python literal" outputs the
+            string representation of the Python objects. "JSON" outputs a JSON document per value.
+            "JSON Lines" outputs a line with the metadata of each file, followed by a line per
+            page.""",
+            default_value=OUTPUT_FORMAT_PYTHON,
+        ),
+        PluginParameter(
+            param_type=ChoiceParameterType(OUTPUT_MODE_PARAMETER_CHOICES),
+            name="output_mode",
+            label="Output mode",
+            description="""If set to "One entity per file", the result of each file is output in
+            a single value. If set to "One entity per page", an entity is output for each page
+            with the paths filename, page_number, text, tables and error. If set to "One entity
+            per table row", an entity is output for each row of the extracted tables. Results can
+            only be combined with one entity per file.""",
+            default_value=OUTPUT_MODE_FILE,
+        ),
+        PluginParameter(
+            param_type=StringParameterType(),
+            name="output_resource",
+            label="Output file",
+            description="""If set, the results are written as JSON Lines to this project file
+            instead of being output as entities, and the output mode, output format and
+            combination of results are not used. If the file name ends with ".parquet" or
+            ".arrow", the table rows are written as a Parquet or Arrow file instead, which
+            requires the pyarrow package, installed with the "parquet" extra of the plugin. A
+            single entity is output with the name of the file and the number of files, pages
+            and errors.""",
+            advanced=True,
+            default_value="",
+        ),
+        PluginParameter(
+            param_type=IntParameterType(),
+            name="table_columns",
+            label="Number of table columns",
+            description="""The number of positional column paths (col_1, col_2, ...) of the
+            output schema with one entity per table row. Cells beyond this number are only
+            output on the cells path.""",
+            advanced=True,
+            default_value=TABLE_COLUMNS_DEFAULT,
+        ),
         PluginParameter(
             param_type=StringParameterType(),
             name="page_selection",
@@ -155,7 +316,10 @@ TYPE_URI = "urn:x-eccenca:PdfExtract"
             label="Text extraction strategy",
             description="""Specifies how text is extracted from a PDF page.
             Options include "raw", "layout", and others, each interpreting character positions and
-            formatting differently to control how text is grouped and ordered.""",
+            formatting differently to control how text is grouped and ordered. "Text only (fast)"
+            extracts the same text as "Default" considerably faster, but does not extract
+            tables. "Automatic" probes a few pages of each file and chooses the cheapest adequate
+            strategy for it, which is recorded in the metadata of the file.""",
             default_value=TEXT_DEFAULT,
         ),
         PluginParameter(
@@ -165,9 +329,54 @@ TYPE_URI = "urn:x-eccenca:PdfExtract"
             description="""Specifies the method used to detect tables in the PDF page. Options
             include "lines" and "text", each using different cues (such as  lines or text alignment)
             to find tables. If "Custom" is selected, a custom setting needs to defined under
-            advanced options.""",
+            advanced options. "Automatic" probes a few pages of each file for ruling lines and
+            columns of text and chooses the strategy for it, which is recorded in the metadata of
+            the file.""",
             default_value=TABLE_LINES,
         ),
+        PluginParameter(
+            param_type=ChoiceParameterType(ENGINE_PARAMETER_CHOICES),
+            name="engine",
+            label="Extraction engine",
+            description="""The library used to extract the pages. "pdfplumber" supports all
+            text and table extraction strategies. "PDFium (fast, text only)" extracts the text
+            with the native PDFium library considerably faster, but does not extract tables and
+            does not use the text extraction strategy. Since PDFium cannot be called from several
+            threads at once, it should be combined with the "Processes" executor backend.""",
+            advanced=True,
+            default_value=ENGINE_PDFPLUMBER,
+        ),
+        PluginParameter(
+            param_type=BoolParameterType(),
+            name="ocr",
+            label="OCR of image-only pages",
+            description="""If enabled, the text of image-only pages, such as scans without a
+            text layer, is recognized with Tesseract, which needs to be installed on the PATH of
+            the plugin. Only these pages are rendered and recognized, by separate Tesseract
+            processes. The recognized text is cached by the content of the page if a cache
+            directory is set.""",
+            advanced=True,
+            default_value=False,
+        ),
+        PluginParameter(
+            param_type=StringParameterType(),
+            name="ocr_language",
+            label="OCR language",
+            description="""The Tesseract language codes of the text to be recognized, joined by
+            "+" for multiple languages, e.g. "eng" or "deu+eng".""",
+            advanced=True,
+            default_value=OCR_LANGUAGE_DEFAULT,
+        ),
+        PluginParameter(
+            param_type=IntParameterType(),
+            name="ocr_processes",
+            label="Maximum number of OCR processes",
+            description="""The maximum number of processes that recognize the text of
+            image-only pages concurrently. These processes are separate from those processing the
+            files, so that the OCR does not hold up the extraction of other files.""",
+            advanced=True,
+            default_value=1,
+        ),
         PluginParameter(
             param_type=MultilineStringParameterType(),
             name="custom_text_strategy",
@@ -190,6 +399,80 @@ TYPE_URI = "urn:x-eccenca:PdfExtract"
             advanced=True,
             default_value=MAX_PROCESSES_DEFAULT,
         ),
+        PluginParameter(
+            param_type=ChoiceParameterType(EXECUTOR_PARAMETER_CHOICES),
+            name="executor_backend",
+            label="Executor backend",
+            description="""The backend used to process multiple files concurrently. "Threads"
+            share a single Python interpreter and are therefore limited to one CPU core for the
+            extraction itself. "Processes" run the extraction in separate worker processes and
+            scale with the number of cores.""",
+            advanced=True,
+            default_value=EXECUTOR_THREADS,
+        ),
+        PluginParameter(
+            param_type=IntParameterType(),
+            name="page_chunk_size",
+            label="Page chunk size",
+            description="""If set to a value greater than 0, files are processed one after
+            another, and the pages of each file are split into chunks of this size which are
+            processed concurrently. This speeds up the extraction of single very large files.
+            If set to 0, each file is processed as a whole.""",
+            advanced=True,
+            default_value=0,
+        ),
+        PluginParameter(
+            param_type=IntParameterType(),
+            name="max_files_in_flight",
+            label="Maximum number of files in flight",
+            description=f"""The maximum number of files that are submitted for processing at
+            the same time. New files are only submitted (and downloaded) when other files have
+            been completed. If set to 0, {IN_FLIGHT_FILES_PER_PROCESS} times the maximum number of
+            processes is used.""",
+            advanced=True,
+            default_value=0,
+        ),
+        PluginParameter(
+            param_type=BoolParameterType(),
+            name="ordered_output",
+            label="Preserve input order",
+            description="""If enabled, the results are output in the order of the input files.
+            Files are still processed concurrently, and the results of files completed before
+            their predecessors are held back until these have been output. If disabled, the
+            results are output in the order in which the files are completed.""",
+            advanced=True,
+            default_value=False,
+        ),
+        PluginParameter(
+            param_type=StringParameterType(),
+            name="cache_directory",
+            label="Cache directory",
+            description="""Directory for caching extraction results. Results are cached by
+            the content of the file and the extraction settings, so unchanged files are not
+            parsed again. If empty, no cache is used.""",
+            advanced=True,
+            default_value="",
+        ),
+        PluginParameter(
+            param_type=IntParameterType(),
+            name="cache_max_size",
+            label="Maximum cache size (MB)",
+            description="""The maximum size of the cache directory in megabytes. The least
+            recently used results are removed when the cache exceeds this size.""",
+            advanced=True,
+            default_value=CACHE_MAX_SIZE_DEFAULT,
+        ),
+        PluginParameter(
+            param_type=BoolParameterType(),
+            name="incremental",
+            label="Incremental processing",
+            description="""If enabled, the modification timestamp and size of each project
+            file are recorded in the cache directory. Project files that have not changed since a
+            previous run are served from the cache without downloading them. Requires a cache
+            directory.""",
+            advanced=True,
+            default_value=False,
+        ),
     ],
 )
 class PdfExtract(WorkflowPlugin):
@@ -209,7 +492,22 @@ class PdfExtract(WorkflowPlugin):
         custom_text_strategy: str = "\n".join(
             f"# {_}" for _ in yaml.dump(DEFAULT_TEXT_EXTRACTION).strip().splitlines()
         ),
+        engine: str = ENGINE_PDFPLUMBER,
+        ocr: bool = False,
+        ocr_language: str = OCR_LANGUAGE_DEFAULT,
+        ocr_processes: int = 1,
         max_processes: int = MAX_PROCESSES_DEFAULT,
+        executor_backend: str = EXECUTOR_THREADS,
+        page_chunk_size: int = 0,
+        max_files_in_flight: int = 0,
+        ordered_output: bool = False,
+        cache_directory: str = "",
+        cache_max_size: int = CACHE_MAX_SIZE_DEFAULT,
+        incremental: bool = False,
+        output_format: str = OUTPUT_FORMAT_PYTHON,
+        output_mode: str = OUTPUT_MODE_FILE,
+        table_columns: int = TABLE_COLUMNS_DEFAULT,
+        output_resource: str = "",
     ) -> None:
         if page_selection:
             validate_page_selection(page_selection)
@@ -224,10 +522,39 @@ class PdfExtract(WorkflowPlugin):
             raise ValueError(f"Invalid error handling mode: {error_handling}")
         self.error_handling = error_handling
 
+        if engine not in ENGINE_PARAMETER_CHOICES:
+            raise ValueError(f"Invalid extraction engine: {engine}")
+        self.engine = engine
+
+        self.set_ocr(ocr, ocr_language, ocr_processes)
+
+        if executor_backend not in EXECUTOR_PARAMETER_CHOICES:
+            raise ValueError(f"Invalid executor backend: {executor_backend}")
+        self.executor_backend = executor_backend
+
+        if page_chunk_size < 0:
+            raise ValueError(f"Invalid page chunk size: {page_chunk_size}")
+        self.page_chunk_size = page_chunk_size
+
+        if max_files_in_flight < 0:
+            raise ValueError(f"Invalid maximum number of files in flight: {max_files_in_flight}")
+        self.max_files_in_flight = max_files_in_flight
+        self.ordered_output = ordered_output
+
+        if cache_max_size < 0:
+            raise ValueError(f"Invalid maximum cache size: {cache_max_size}")
+        self.cache = (
+            ResultCache(cache_directory, cache_max_size * 1024 * 1024) if cache_directory else None
+        )
+        if incremental and not self.cache:
+            raise ValueError("Incremental processing requires a cache directory")
+        self.incremental = incremental
+
         self.regex = rf"{regex}"
         self.all_files = all_files
         self.max_processes = max_processes
-        self.schema = EntitySchema(type_uri=TYPE_URI, paths=[EntityPath("pdf_extract_output")])
+        self.schema: EntitySchema
+        self.set_output(all_files, output_format, output_mode, table_columns, output_resource)
         self.input_ports = (
             FixedNumberOfInputs([FixedSchemaPort(schema=FileEntitySchema())])
             if not self.regex
@@ -235,6 +562,58 @@ class PdfExtract(WorkflowPlugin):
         )
         self.output_port = FixedSchemaPort(self.schema)
 
+    def set_output(
+        self,
+        all_files: str,
+        output_format: str,
+        output_mode: str,
+        table_columns: int,
+        output_resource: str,
+    ) -> None:
+        """Set the output format, mode and resource, and the output schema"""
+        if output_format not in OUTPUT_FORMAT_PARAMETER_CHOICES:
+            raise ValueError(f"Invalid output format: {output_format}")
+        self.output_format = output_format
+
+        if output_mode not in OUTPUT_MODE_PARAMETER_CHOICES:
+            raise ValueError(f"Invalid output mode: {output_mode}")
+        if output_mode != OUTPUT_MODE_FILE and all_files == COMBINE:
+            raise ValueError("Results can only be combined with one entity per file")
+        self.output_mode = output_mode
+
+        if table_columns < 1:
+            raise ValueError(f"Invalid number of table columns: {table_columns}")
+        self.table_columns = table_columns
+
+        self.output_resource = output_resource.strip()
+        if self.output_resource.endswith(TABLE_OUTPUT_SUFFIXES) and not find_spec("pyarrow"):
+            raise ValueError(
+                "Parquet and Arrow output files require the pyarrow package, "
+                'install the plugin with the "parquet" extra'
+            )
+
+        if self.output_resource:
+            paths = RESOURCE_SCHEMA_PATHS
+        elif output_mode == OUTPUT_MODE_PAGE:
+            paths = PAGE_SCHEMA_PATHS
+        elif output_mode == OUTPUT_MODE_TABLE_ROW:
+            paths = TABLE_ROW_SCHEMA_PATHS + [f"col_{_}" for _ in range(1, table_columns + 1)]
+        else:
+            paths = ["pdf_extract_output"]
+        self.schema = EntitySchema(type_uri=TYPE_URI, paths=[EntityPath(_) for _ in paths])
+
+    def set_ocr(self, ocr: bool, ocr_language: str, ocr_processes: int) -> None:
+        """Set the OCR of image-only pages"""
+        if ocr and not OCR_LANGUAGE_PATTERN.fullmatch(ocr_language):
+            raise ValueError(f"Invalid OCR language: {ocr_language}")
+        if ocr and ocr_processes < 1:
+            raise ValueError(f"Invalid maximum number of OCR processes: {ocr_processes}")
+        self.ocr = ocr
+        self.ocr_language = ocr_language
+        self.ocr_processes = ocr_processes
+        # the directory of the rendered page images while the files are processed
+        self.ocr_directory: str | None = None
+
     def set_text_strategy(self, custom_text_strategy: str, text_strategy: str) -> None:
         """Set text strategy to be used in extraction"""
         if text_strategy not in TEXT_STRATEGY_PARAMETER_CHOICES:
@@ -253,6 +632,8 @@ class PdfExtract(WorkflowPlugin):
                 self.text_strategy = safe_load(cleaned_string)
             except YAMLError as e:
                 raise YAMLError(f"Invalid custom text strategy: {e}") from e
+        elif text_strategy == TEXT_AUTO:
+            self.text_strategy = AUTO_STRATEGY
         else:
             self.text_strategy = TEXT_EXTRACTION_STRATEGIES[text_strategy]
 
@@ -274,6 +655,8 @@ class PdfExtract(WorkflowPlugin):
                 self.table_strategy = safe_load(cleaned_string)
             except YAMLError as e:
                 raise YAMLError(f"Invalid custom table strategy: {e}") from e
+        elif table_strategy == TABLE_AUTO:
+            self.table_strategy = AUTO_STRATEGY
         else:
             self.table_strategy = TABLE_EXTRACTION_STRATEGIES[table_strategy]
 
@@ -294,6 +677,96 @@ class PdfExtract(WorkflowPlugin):
         )
         return "\n".join(output)
 
+    @staticmethod
+    def select_pages(page_numbers: list, page_count: int) -> tuple[Sequence[int], list[int]]:
+        """Split the page selection into existing and non-existing pages of a file."""
+        valid_page_numbers = (
+            [_ for _ in page_numbers if _ <= page_count]
+            if page_numbers
+            else range(1, page_count + 1)
+        )
+        invalid_page_numbers = list(set(page_numbers) - set(valid_page_numbers))
+        return valid_page_numbers, invalid_page_numbers
+
+    @staticmethod
+    def file_error(e: Exception, filename: str, page_number: int | None) -> Exception:
+        """Create an exception of the same type with the file and page in the message."""
+        if page_number is not None:
+            msg = f"File {filename}, page {page_number}: {e}"
+        else:
+            msg = f"File {filename}: {e}"
+        return type(e)(msg)
+
+    @staticmethod
+    def cache_settings(  # noqa: PLR0913
+        page_numbers: list,
+        table_settings: dict,
+        text_settings: dict,
+        error_handling: str,
+        engine: str = ENGINE_PDFPLUMBER,
+        ocr_language: str | None = None,
+    ) -> dict:
+        """Get the settings that determine the extraction result of a file."""
+        return {
+            "page_numbers": page_numbers,
+            "table_settings": table_settings,
+            "text_settings": text_settings,
+            "error_handling": error_handling,
+            "engine": engine,
+            "ocr_language": ocr_language,
+        }
+
+    @staticmethod
+    @contextmanager
+    def open_file(  # noqa: PLR0913
+        filename: str,
+        file_origin: str,
+        project_id: str,
+        cache: ResultCache | None,
+        cache_settings: dict,
+        resource_info: dict | None,
+        spool_threshold: int = SPOOL_THRESHOLD,
+    ) -> Generator[tuple[str | IO[bytes], str | None, dict | None]]:
+        """Open a file and look up its extraction result in the cache.
+
+        Yields the source of the file, the cache key and the cached result, if any. The
+        source is the path of a local file, or a project resource streamed to memory or, if
+        larger than the spool threshold, to a temporary file. If the modification timestamp
+        and size of a project resource are unchanged, the cached result is yielded without
+        downloading the resource.
+        """
+        if file_origin != "Project":
+            # a local file may have the same name as a project resource
+            resource_info = None
+        if cache and resource_info:
+            content_hash = cache.get_content_hash(file_origin, project_id, filename, resource_info)
+            if content_hash:
+                cache_key = cache.key(content_hash, **cache_settings)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    cached["metadata"]["Filename"] = filename
+                    yield filename, cache_key, cached
+                    return
+        with ExitStack() as stack:
+            source: str | IO[bytes] = (
+                filename
+                if file_origin == "Local"
+                else stack.enter_context(spool_resource(project_id, filename, spool_threshold))
+            )
+            if not cache:
+                yield source, None, None
+                return
+            content_hash = cache.content_hash(source)
+            if resource_info:
+                cache.put_content_hash(
+                    file_origin, project_id, filename, resource_info, content_hash
+                )
+            cache_key = cache.key(content_hash, **cache_settings)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                cached["metadata"]["Filename"] = filename
+            yield source, cache_key, cached
+
     @staticmethod
     def extract_pdf_data_worker(  # noqa: PLR0913
         filename: str,
@@ -303,71 +776,469 @@ class PdfExtract(WorkflowPlugin):
         text_settings: dict,
         error_handling: str,
         file_origin: str,
+        cache: ResultCache | None = None,
+        resource_info: dict | None = None,
+        engine: str = ENGINE_PDFPLUMBER,
+        ocr_language: str | None = None,
+        ocr_directory: str | None = None,
     ) -> dict:
-        """Extract structured PDF data (sequential processing)."""
+        """Extract structured PDF data (sequential processing).
+
+        Results that are not served from the cache include the statistics of the file under
+        "stats" and the processing time of each page under "page_times". If an OCR language
+        is given, the images of image-only pages are rendered for the OCR to files in the OCR
+        directory, with their paths under "ocr".
+        """
         output: dict = {"metadata": {"Filename": filename}, "pages": []}
-        binary_file: str | BytesIO
-        if file_origin == "Local":
-            binary_file = filename
-        else:
-            binary_file = BytesIO(get_resource(project_id, filename))
-        page_number = None
-        try:
-            with pdfplumber_open(binary_file) as pdf:
-                output["metadata"].update(pdf.metadata or {})
-                valid_page_numbers = (
-                    [_ for _ in page_numbers if _ <= len(pdf.pages)]
-                    if page_numbers
-                    else range(1, len(pdf.pages) + 1)
-                )
-                invalid_page_numbers = list(set(page_numbers) - set(valid_page_numbers))
-                for page_number in valid_page_numbers:
-                    try:
-                        page_data = PdfExtract.process_page(
-                            pdf.pages[page_number - 1],
-                            page_number,
+        stats: Counter = Counter()
+        page_times: Counter = Counter()
+        with timer(stats, STATS_TIME_FILE), ExitStack() as stack:
+            with timer(stats, STATS_TIME_DOWNLOAD):
+                source, cache_key, cached = stack.enter_context(
+                    PdfExtract.open_file(
+                        filename,
+                        file_origin,
+                        project_id,
+                        cache,
+                        PdfExtract.cache_settings(
+                            page_numbers,
                             table_settings,
                             text_settings,
                             error_handling,
+                            engine,
+                            ocr_language,
+                        ),
+                        resource_info,
+                    )
+                )
+            if cached is not None:
+                return cast("dict", cached)
+            stats[STATS_BYTES] += source_size(source)
+            page_number = None
+            ocr_images: dict[int, str] = {}
+            try:
+                table_settings, text_settings = PdfExtract.resolve_strategies(
+                    engine, source, page_numbers, table_settings, text_settings, output, stats
+                )
+                with timer(stats, STATS_TIME_OPEN):
+                    pdf = PdfExtract.open_document(engine, source, text_settings)
+                with pdf:
+                    output["metadata"].update(pdf.metadata)
+                    valid_page_numbers, invalid_page_numbers = PdfExtract.select_pages(
+                        page_numbers, pdf.page_count
+                    )
+                    for page_number in valid_page_numbers:
+                        with timer(page_times, page_number):
+                            page = PdfExtract.extract_page_data(
+                                pdf,
+                                page_number,
+                                table_settings,
+                                text_settings,
+                                error_handling,
+                                stats,
+                            )
+                        output["pages"].append(page)
+                    for page_number in invalid_page_numbers:
+                        output["pages"].append(
+                            {"page_number": page_number, "error": "page does not exist"}
                         )
-                        output["pages"].append(page_data)
-                    except Exception as e:
-                        if error_handling != IGNORE:
-                            raise
-                        output["pages"].append({"page_number": page_number, "error": str(e)})
-                for page_number in invalid_page_numbers:
-                    output["pages"].append(
-                        {"page_number": page_number, "error": "page does not exist"}
+                    PdfExtract.count_image_only_pages(output)
+                page_number = None
+                if ocr_language is not None:
+                    ocr_images = PdfExtract.render_image_only_pages(
+                        source, output, stats, ocr_directory
                     )
 
+            except Exception as e:
+                if error_handling != IGNORE:
+                    raise PdfExtract.file_error(e, filename, page_number) from e
+                output["metadata"]["error"] = str(e)
+
+        PdfExtract.cache_result(cache, cache_key, output, ocr_images)
+        # the statistics describe this run only, so they are not cached
+        output["stats"] = dict(stats)
+        output["page_times"] = dict(page_times)
+        return output
+
+    @staticmethod
+    def extract_pdf_pages_worker(  # noqa: PLR0913
+        source: str | bytes,
+        filename: str,
+        page_numbers: list,
+        table_settings: dict,
+        text_settings: dict,
+        error_handling: str,
+        engine: str = ENGINE_PDFPLUMBER,
+    ) -> tuple[list[dict], dict, dict]:
+        """Extract a chunk of pages from PDF data (page-level parallel processing).
+
+        Returns the extracted pages, the statistics of the chunk and the processing time of
+        each page.
+        """
+        pages: list[dict] = []
+        stats: Counter = Counter()
+        page_times: Counter = Counter()
+        page_number = None
+        try:
+            with timer(stats, STATS_TIME_OPEN):
+                pdf = PdfExtract.open_document(
+                    engine, source if isinstance(source, str) else BytesIO(source), text_settings
+                )
+            with pdf:
+                for page_number in page_numbers:
+                    with timer(page_times, page_number):
+                        page = PdfExtract.extract_page_data(
+                            pdf, page_number, table_settings, text_settings, error_handling, stats
+                        )
+                    pages.append(page)
         except Exception as e:
             if error_handling != IGNORE:
-                if page_number is not None:
-                    msg = f"File {filename}, page {page_number}: {e}"
-                else:
-                    msg = f"File {filename}: {e}"
-                raise type(e)(msg) from e
+                raise PdfExtract.file_error(e, filename, page_number) from e
+            pages.extend({"page_number": _, "error": str(e)} for _ in page_numbers[len(pages) :])
+        return pages, dict(stats), dict(page_times)
+
+    @staticmethod
+    def resolve_strategies(  # noqa: PLR0913
+        engine: str,
+        source: str | IO[bytes],
+        page_numbers: list,
+        table_settings: dict,
+        text_settings: dict,
+        output: dict,
+        stats: Counter,
+    ) -> tuple[dict, dict]:
+        """Choose automatic strategies for a file, recording the choice in its metadata.
+
+        The strategies are only used by pdfplumber, so they are not chosen for other engines.
+        """
+        if engine != ENGINE_PDFPLUMBER or not (is_auto(table_settings) or is_auto(text_settings)):
+            return table_settings, text_settings
+        with timer(stats, STATS_TIME_PROBE):
+            table_settings, text_settings, chosen = resolve_strategies(
+                source, page_numbers, table_settings, text_settings
+            )
+        output["metadata"].update(chosen)
+        return table_settings, text_settings
+
+    @staticmethod
+    def open_document(engine: str, source: str | IO[bytes], text_settings: dict) -> EngineDocument:
+        """Open a document with an extraction engine for the text extraction settings."""
+        return open_document(engine, source, text_only=bool(text_settings.get(TEXT_ONLY_SETTING)))
+
+    @staticmethod
+    def extract_page_data(  # noqa: PLR0913
+        pdf: EngineDocument,
+        page_number: int,
+        table_settings: dict,
+        text_settings: dict,
+        error_handling: str,
+        stats: Counter | None = None,
+    ) -> dict:
+        """Extract a page of an opened PDF, recording errors in the result if ignored.
+
+        Image-only pages, such as scans without a text layer, are marked as such with empty
+        text and tables, without extracting them. The check runs the layout analysis of the
+        page, so its pdfminer logs are captured for the text extraction.
+        """
+        page = pdf.page(page_number)
+        try:
+            with capture_pdfminer_logs() as stderr:
+                image_only = page.is_image_only()
+            layout_log = stderr.getvalue()
+            if image_only:
+                if stats is not None:
+                    stats[STATS_PAGES] += 1
+                    stats[STATS_IMAGE_ONLY_PAGES] += 1
+                return PdfExtract.page_result(
+                    {"page_number": page_number, "text": "", "tables": [], "image_only": True},
+                    f"Text extraction error: {layout_log.strip()}" if layout_log.strip() else None,
+                    error_handling,
+                )
+            return PdfExtract.process_page(
+                page,
+                page_number,
+                table_settings,
+                text_settings,
+                error_handling,
+                stats,
+                layout_log,
+            )
+        except Exception as e:
+            if error_handling != IGNORE:
+                raise
+            return {"page_number": page_number, "error": str(e)}
+        finally:
+            page.close()
+
+    def extract_pdf_data_chunked(
+        self, executor: Executor, filename: str, file_origin: str, resource_info: dict | None
+    ) -> dict:
+        """Extract structured PDF data, distributing chunks of pages over the executor."""
+        stats: Counter = Counter()
+        page_times: Counter = Counter()
+        with timer(stats, STATS_TIME_FILE), ExitStack() as stack:
+            with timer(stats, STATS_TIME_DOWNLOAD):
+                source, cache_key, cached = stack.enter_context(
+                    PdfExtract.open_file(
+                        filename,
+                        file_origin,
+                        self.context.task.project_id(),
+                        self.cache,
+                        PdfExtract.cache_settings(
+                            self.page_numbers,
+                            self.table_strategy,
+                            self.text_strategy,
+                            self.error_handling,
+                            self.engine,
+                            self.ocr_language if self.ocr else None,
+                        ),
+                        resource_info,
+                        # project resources are always spooled to disk, so that workers can
+                        # open them
+                        spool_threshold=0,
+                    )
+                )
+            if cached is not None:
+                return cast("dict", cached)
+            stats[STATS_BYTES] += source_size(source)
+            chunk_source: str | bytes
+            if isinstance(source, str):
+                chunk_source = source
+            elif isinstance(source, BytesIO):
+                chunk_source = source.getvalue()
+            else:
+                chunk_source = source.name
+            output = self.extract_chunks(executor, filename, chunk_source, stats, page_times)
+            ocr_images: dict[int, str] = {}
+            if self.ocr:
+                try:
+                    ocr_images = PdfExtract.render_image_only_pages(
+                        chunk_source if isinstance(chunk_source, str) else BytesIO(chunk_source),
+                        output,
+                        stats,
+                        self.ocr_directory,
+                    )
+                except Exception as e:
+                    if self.error_handling != IGNORE:
+                        raise PdfExtract.file_error(e, filename, None) from e
+                    output["metadata"]["error"] = str(e)
+
+        PdfExtract.cache_result(self.cache, cache_key, output, ocr_images)
+        # the statistics describe this run only, so they are not cached
+        output["stats"] = dict(stats)
+        output["page_times"] = dict(page_times)
+        return output
+
+    def extract_chunks(
+        self,
+        executor: Executor,
+        filename: str,
+        source: str | bytes,
+        stats: Counter,
+        page_times: Counter,
+    ) -> dict:
+        """Extract structured PDF data from a path or bytes, page chunks in parallel."""
+        output: dict = {"metadata": {"Filename": filename}, "pages": []}
+        try:
+            # the strategies are chosen once, so that all chunks use the same ones
+            table_settings, text_settings = PdfExtract.resolve_strategies(
+                self.engine,
+                source if isinstance(source, str) else BytesIO(source),
+                self.page_numbers,
+                self.table_strategy,
+                self.text_strategy,
+                output,
+                stats,
+            )
+            with (
+                timer(stats, STATS_TIME_OPEN),
+                PdfExtract.open_document(
+                    self.engine,
+                    source if isinstance(source, str) else BytesIO(source),
+                    text_settings,
+                ) as pdf,
+            ):
+                output["metadata"].update(pdf.metadata)
+                page_count = pdf.page_count
+        except Exception as e:
+            if self.error_handling != IGNORE:
+                raise PdfExtract.file_error(e, filename, None) from e
             output["metadata"]["error"] = str(e)
+            return output
 
+        valid_page_numbers, invalid_page_numbers = PdfExtract.select_pages(
+            self.page_numbers, page_count
+        )
+        valid_page_numbers = list(valid_page_numbers)
+        chunks = [
+            valid_page_numbers[i : i + self.page_chunk_size]
+            for i in range(0, len(valid_page_numbers), self.page_chunk_size)
+        ]
+        # executor.map returns the chunk results in submission order, i.e. in page order
+        for pages, chunk_stats, chunk_page_times in executor.map(
+            PdfExtract.extract_pdf_pages_worker,
+            repeat(source),
+            repeat(filename),
+            chunks,
+            repeat(table_settings),
+            repeat(text_settings),
+            repeat(self.error_handling),
+            repeat(self.engine),
+        ):
+            output["pages"].extend(pages)
+            stats.update(chunk_stats)
+            page_times.update(chunk_page_times)
+        output["pages"].extend(
+            {"page_number": _, "error": "page does not exist"} for _ in invalid_page_numbers
+        )
+        PdfExtract.count_image_only_pages(output)
         return output
 
     @staticmethod
-    def process_page(
-        page: Page, page_number: int, table_settings: dict, text_settings: dict, error_handling: str
+    def render_image_only_pages(
+        source: str | IO[bytes], output: dict, stats: Counter, directory: str | None
+    ) -> dict[int, str]:
+        """Render the image-only pages of a file result to image files for the OCR."""
+        page_numbers = [page["page_number"] for page in output["pages"] if page.get("image_only")]
+        if not page_numbers:
+            return {}
+        with timer(stats, STATS_TIME_RENDER):
+            return render_pages(source, page_numbers, OCR_DPI, directory)
+
+    @staticmethod
+    def cache_result(
+        cache: ResultCache | None, cache_key: str | None, output: dict, ocr_images: dict
+    ) -> None:
+        """Cache a file result, unless the text of its image-only pages is still recognized.
+
+        The image paths and the cache key are then passed on under "ocr", so that the result
+        is cached once the recognized text has been merged into it.
+        """
+        if ocr_images:
+            output["ocr"] = {"images": ocr_images, "cache_key": cache_key}
+        elif cache and cache_key:
+            cache.put(cache_key, output)
+
+    def create_ocr_executor(self, stack: ExitStack) -> Executor | None:
+        """Create the thread pool of the OCR, if enabled, which is shut down with the stack.
+
+        Each thread waits for a Tesseract process, so that the OCR does not hold up the
+        extraction. The page images are rendered to a temporary OCR directory, which is
+        removed with the stack, including the images of files that were not recognized.
+        """
+        if not self.ocr:
+            return None
+        self.ocr_directory = stack.enter_context(TemporaryDirectory(prefix="pdf-extract-ocr-"))
+        executor = ThreadPoolExecutor(max_workers=self.ocr_processes)
+        stack.callback(executor.shutdown, wait=True, cancel_futures=True)
+        return executor
+
+    def submit_ocr(
+        self, executor: Executor | None, result: dict
+    ) -> tuple[dict[Future, dict], str | None]:
+        """Submit the OCR of the rendered image-only pages of a file result without waiting.
+
+        Returns the futures of the recognized text with their pages, and the cache key of the
+        file result.
+        """
+        ocr = result.pop("ocr", None)
+        if not ocr or executor is None:
+            return {}, None
+        futures: dict[Future, dict] = {}
+        for page in result["pages"]:
+            image_path = ocr["images"].get(page["page_number"])
+            if image_path is not None:
+                futures[executor.submit(self.recognize_page, image_path)] = page
+        return futures, ocr["cache_key"]
+
+    def merge_ocr(
+        self,
+        filename: str,
+        result: dict,
+        futures: dict[Future, dict],
+        cache_key: str | None,
+        stats: Counter,
+    ) -> None:
+        """Merge the recognized text of completed OCR futures into the pages of a file result.
+
+        The file result is cached if its pages were recognized without errors.
+        """
+        if not futures:
+            return
+        errors = 0
+        for future, page in futures.items():
+            try:
+                text = future.result()
+            except Exception as e:
+                if self.error_handling != IGNORE:
+                    raise PdfExtract.file_error(e, filename, page["page_number"]) from e
+                page["error"] = str(e)
+                errors += 1
+                continue
+            page.update(text=text, ocr=True)
+            stats[STATS_OCR_PAGES] += 1
+        if self.cache and cache_key and not errors:
+            self.cache.put(cache_key, result)
+
+    def recognize_page(self, image_path: str) -> str:
+        """Recognize the text of a page image file and remove the file.
+
+        The text is cached by the content of the page image, so that the same scanned page is
+        only recognized once.
+        """
+        try:
+            key = ResultCache.key(
+                ResultCache.content_hash(image_path), ocr_language=self.ocr_language, dpi=OCR_DPI
+            )
+            text = self.cache.get(key) if self.cache else None
+            if text is None:
+                text = recognize(image_path, self.ocr_language)
+                if self.cache:
+                    self.cache.put(key, text)
+            return cast("str", text)
+        finally:
+            Path(image_path).unlink(missing_ok=True)
+
+    @staticmethod
+    def count_image_only_pages(output: dict) -> None:
+        """Record the number of image-only pages of a file in its metadata, if there are any."""
+        count = sum(page.get("image_only", False) for page in output["pages"])
+        if count:
+            output["metadata"]["image_only_pages"] = count
+
+    @staticmethod
+    def process_page(  # noqa: PLR0913
+        page: EnginePage,
+        page_number: int,
+        table_settings: dict,
+        text_settings: dict,
+        error_handling: str,
+        stats: Counter | None = None,
+        layout_log: str = "",
     ) -> dict:
-        """Process a single PDF page and return extracted content."""
+        """Process a single PDF page and return extracted content.
+
+        If given, the statistics are updated with the number of pages processed, the
+        number of pages on which the table detection was skipped, and the time spent on the
+        text and table extraction. The pdfminer logs of an earlier layout analysis of the page
+        are added to those of the text extraction.
+        """
         text_warning = None
         table_warning = None
         stderr_warning = None
+        text_kwargs = {k: v for k, v in text_settings.items() if k != TEXT_ONLY_SETTING}
         try:
-            with capture_pdfminer_logs() as stderr:
-                text = page.extract_text(**text_settings) or ""
-            stderr_output = stderr.getvalue().strip()
+            with timer(stats, STATS_TIME_TEXT), capture_pdfminer_logs() as stderr:
+                text = page.extract_text(**text_kwargs) or ""
+            stderr_output = (layout_log + stderr.getvalue()).strip()
             if not text and stderr_output:
                 text_warning = f"Text extraction error: {stderr_output}"
 
-            with capture_pdfminer_logs() as stderr:
+            with timer(stats, STATS_TIME_TABLES), capture_pdfminer_logs() as stderr:
                 tables = page.extract_tables(table_settings) or []
+            if stats is not None:
+                stats[STATS_PAGES] += 1
+                stats[STATS_TABLE_DETECTION_SKIPPED] += page.table_detection_skipped
             stderr_output = stderr.getvalue().strip()
             if not tables and stderr_output:
                 table_warning = f"Table extraction error: {stderr_output}"
@@ -384,29 +1255,81 @@ class PdfExtract(WorkflowPlugin):
                 raise
             return {"page_number": page_number, "error": str(e)}
 
-        if stderr_warning:
+        return PdfExtract.page_result(
+            {"page_number": page_number, "text": text, "tables": tables},
+            stderr_warning,
+            error_handling,
+        )
+
+    @staticmethod
+    def page_result(page: dict, warning: str | None, error_handling: str) -> dict:
+        """Add the pdfminer warning of a page to its result, or raise it if requested."""
+        if warning:
             if error_handling == RAISE_ON_ERROR_AND_WARNING:
-                raise ValueError(stderr_warning)
-            return {
-                "page_number": page_number,
-                "text": text,
-                "tables": tables,
-                "error": stderr_warning,
-            }
-        return {
-            "page_number": page_number,
-            "text": text,
-            "tables": tables,
-        }
+                raise ValueError(warning)
+            page["error"] = warning
+        return page
+
+    def create_executor(self) -> Executor:
+        """Create the executor used to process files concurrently.
 
-    def get_entities(self, filenames: list, file_origins: list) -> Entities:
-        """Make entities from extracted PDF data across multiple files."""
-        entities: list[Entity] = []
-        all_output = []
+        Worker processes do not inherit the environment set up for cmempy after their server
+        process was started, so the whole environment of the plugin process is passed to
+        them. cmempy reads endpoints, credentials and custom request headers from it.
+        """
+        if self.executor_backend == EXECUTOR_PROCESSES:
+            return ProcessPoolExecutor(
+                max_workers=self.max_processes,
+                mp_context=get_context(WORKER_START_METHOD),
+                initializer=set_environment,
+                initargs=(dict(environ),),
+            )
+        return ThreadPoolExecutor(max_workers=self.max_processes)
+
+    def iter_results(
+        self,
+        executor: Executor,
+        filenames: list,
+        file_origins: list,
+        resource_info: dict,
+        stats: Counter,
+    ) -> Iterator[tuple[int, str, Callable[[], dict]]]:
+        """Yield the input index and name of files with a callable returning their result.
 
-        with ThreadPoolExecutor(max_workers=self.max_processes) as executor:
-            future_to_file = {
-                executor.submit(
+        The index starts at 1 and identifies the file among inputs of the same name. In
+        ordered mode, the files are yielded in the input order, and the number of completed
+        files waiting for a predecessor is recorded as the maximum reorder buffer size.
+        """
+        if self.page_chunk_size:
+            # files are processed one after another, each one using all workers
+            for index, (filename, file_origin) in enumerate(
+                zip(filenames, file_origins, strict=True), start=1
+            ):
+                yield (
+                    index,
+                    filename,
+                    partial(
+                        self.extract_pdf_data_chunked,
+                        executor,
+                        filename,
+                        file_origin,
+                        self.file_resource_info(resource_info, filename, file_origin),
+                    ),
+                )
+            return
+
+        # keep a bounded number of files in flight, so that finished results are consumed
+        # before new files are submitted
+        max_in_flight = self.files_in_flight()
+        files = enumerate(zip(filenames, file_origins, strict=True), start=1)
+        future_to_file: dict[Future, tuple[int, str]] = {}
+        # futures in the order of submission, only used in ordered mode
+        pending: deque[Future] = deque()
+        while True:
+            for index, (filename, file_origin) in islice(
+                files, max_in_flight - len(future_to_file)
+            ):
+                future = executor.submit(
                     PdfExtract.extract_pdf_data_worker,
                     filename,
                     self.page_numbers,
@@ -415,54 +1338,311 @@ class PdfExtract(WorkflowPlugin):
                     self.text_strategy,
                     self.error_handling,
                     file_origin,
-                ): filename
-                for filename, file_origin in zip(filenames, file_origins, strict=True)
-            }
+                    cache=self.cache,
+                    resource_info=self.file_resource_info(resource_info, filename, file_origin),
+                    engine=self.engine,
+                    ocr_language=self.ocr_language if self.ocr else None,
+                    ocr_directory=self.ocr_directory,
+                )
+                future_to_file[future] = (index, filename)
+                if self.ordered_output:
+                    pending.append(future)
+            if not future_to_file:
+                return
+            if self.ordered_output:
+                future = pending.popleft()
+                wait([future])
+                waiting = sum(_.done() for _ in pending)
+                stats[STATS_REORDER_BUFFER] = max(stats[STATS_REORDER_BUFFER], waiting)
+                yield *future_to_file.pop(future), future.result
+                continue
+            done, _ = wait(future_to_file, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield *future_to_file.pop(future), future.result
 
-            for i, future in enumerate(as_completed(future_to_file), start=1):
-                filename = future_to_file[future]
-                try:
-                    if self.context.workflow.status() == "Canceling":
-                        return Entities(entities=entities, schema=self.schema)
-                except AttributeError:
-                    pass
-                try:
-                    result = future.result()
-                except Exception as e:
-                    if self.error_handling != IGNORE:
-                        raise
-                    result = {"metadata": {"Filename": filename, "error": str(e)}, "pages": []}
-
-                if self.all_files == COMBINE:
-                    all_output.append(result)
-                else:
-                    entities.append(Entity(uri=f"{TYPE_URI}_{i}", values=[[str(result)]]))
-
-                self.log.info(f"Processed file {filename} ({i}/{len(filenames)})")
-                self.context.report.update(
-                    ExecutionReport(
-                        entity_count=i,
-                        operation_desc=f"file{'' if i == 1 else 's'} processed",
-                    )
+    def iter_recognized(
+        self,
+        results: Iterator[tuple[int, str, Callable[[], dict]]],
+        ocr_executor: Executor | None,
+        stats: RunStatistics,
+    ) -> Iterator[tuple[int, str, dict]]:
+        """Yield the input index, name and result of files once their OCR is complete.
+
+        The OCR of a file is submitted without waiting for it, so that the next files are
+        extracted in the meantime. The file is held until its pages are recognized, with no
+        more files held than in flight. In ordered mode, files are released in the input order.
+        """
+        held: dict[int, tuple[str, dict, dict[Future, dict], str | None]] = {}
+        for index, filename, get_result in results:
+            if self.canceling():
+                return
+            try:
+                result = get_result()
+            except Exception as e:
+                if self.error_handling != IGNORE:
+                    raise
+                result = {"metadata": {"Filename": filename, "error": str(e)}, "pages": []}
+            stats.add(filename, result.pop("stats", {}), result.pop("page_times", {}))
+            held[index] = (filename, result, *self.submit_ocr(ocr_executor, result))
+            yield from self.release_recognized(held, self.files_in_flight(), stats.counter)
+        yield from self.release_recognized(held, 0, stats.counter)
+
+    def release_recognized(
+        self,
+        held: dict[int, tuple[str, dict, dict[Future, dict], str | None]],
+        limit: int,
+        stats: Counter,
+    ) -> Iterator[tuple[int, str, dict]]:
+        """Release held files whose OCR is complete, waiting until at most limit are held.
+
+        The time spent waiting for the OCR is recorded as the OCR time.
+        """
+        while True:
+            ready = []
+            for index, (_, _, futures, _) in held.items():
+                if all(future.done() for future in futures):
+                    ready.append(index)
+                elif self.ordered_output:
+                    break
+            for index in ready:
+                filename, result, futures, cache_key = held.pop(index)
+                self.merge_ocr(filename, result, futures, cache_key, stats)
+                yield index, filename, result
+            if len(held) <= limit:
+                return
+            waiting = list(held.values())[:1] if self.ordered_output else held.values()
+            with timer(stats, STATS_TIME_OCR):
+                wait(
+                    [future for _, _, futures, _ in waiting for future in futures],
+                    return_when=FIRST_COMPLETED,
                 )
 
+    def files_in_flight(self) -> int:
+        """Get the maximum number of files that are processed at the same time."""
+        return self.max_files_in_flight or IN_FLIGHT_FILES_PER_PROCESS * self.max_processes
+
+    def canceling(self) -> bool:
+        """Check whether the workflow is being cancelled."""
+        try:
+            return bool(self.context.workflow.status() == "Canceling")
+        except AttributeError:
+            return False
+
+    def get_entities(
+        self, filenames: list, file_origins: list, resource_info: dict | None = None
+    ) -> Entities:
+        """Make entities from extracted PDF data across multiple files.
+
+        The optional resource info maps names of project files to their modification
+        timestamp and size, which are used to skip unchanged files in incremental mode.
+        """
+        return Entities(
+            entities=self.iter_entities(filenames, file_origins, resource_info or {}),
+            schema=self.schema,
+        )
+
+    def iter_entities(
+        self, filenames: list, file_origins: list, resource_info: dict
+    ) -> Iterator[Entity]:
+        """Yield entities from extracted PDF data as soon as the files are processed."""
+        processed = 0
+        stats = RunStatistics()
+
+        with ExitStack() as stack:
+            if self.cache:
+                stack.callback(self.cache.evict)
+            executor = self.create_executor()
+            # do not wait for files that have not been started yet when cancelling or failing
+            stack.callback(executor.shutdown, wait=True, cancel_futures=True)
+            ocr_executor = self.create_ocr_executor(stack)
+            # the results of all files are collected in an output instead of separate entities
+            output = self.create_output()
+            if output:
+                stack.enter_context(closing(output))
+            file_uris = self.file_uris(filenames, file_origins)
+            results = self.iter_results(
+                executor, filenames, file_origins, resource_info, stats.counter
+            )
+            for processed, (index, filename, result) in enumerate(
+                self.iter_recognized(results, ocr_executor, stats), start=1
+            ):
+                with timer(stats.counter, STATS_TIME_SERIALIZATION):
+                    if output:
+                        output.write(result)
+                        entities = []
+                    else:
+                        entities = list(self.output_entities(file_uris[index - 1], result))
+                yield from entities
+
+                self.log.info(f"Processed file {filename} ({processed}/{len(filenames)})")
+                self.update_report(processed, stats)
+
+            if self.canceling():
+                return
+            self.update_report(processed, stats)
+
+            if output:
+                yield self.output_entity(output)
+
+        self.log.info("Finished processing all files")
+
+    @staticmethod
+    def file_uris(filenames: list, file_origins: list) -> list[str]:
+        """Create the entity URIs of the input files from their origins and names.
+
+        The URIs do not depend on the processing order or on the other inputs. Repeated
+        inputs of the same origin and name are numbered from the second occurrence on, with
+        parentheses that do not occur in URL-encoded names.
+        """
+        occurrences: Counter = Counter()
+        uris = []
+        for filename, file_origin in zip(filenames, file_origins, strict=True):
+            occurrences[file_origin, filename] += 1
+            uri = f"{TYPE_URI}_{file_origin}_{quote(filename, safe='')}"
+            occurrence = occurrences[file_origin, filename]
+            uris.append(uri if occurrence == 1 else f"{uri}({occurrence})")
+        return uris
+
+    def output_entities(self, file_uri: str, result: dict) -> Iterator[Entity]:
+        """Yield the entities of a file result in the output mode."""
+        if self.output_mode == OUTPUT_MODE_PAGE:
+            yield from self.page_entities(file_uri, result)
+        elif self.output_mode == OUTPUT_MODE_TABLE_ROW:
+            yield from self.table_row_entities(file_uri, result)
+        else:
+            yield Entity(uri=file_uri, values=[[self.format_output(result)]])
+
+    def page_entities(self, file_uri: str, result: dict) -> Iterator[Entity]:
+        """Yield an entity for each page of a file result, or for the error of the file."""
+        filename = result["metadata"]["Filename"]
+        if "error" in result["metadata"]:
+            yield Entity(
+                uri=file_uri,
+                values=[[filename], [], [], [], [result["metadata"]["error"]]],
+            )
+        for page in result["pages"]:
+            tables = page.get("tables")
+            yield Entity(
+                uri=f"{file_uri}_{page['page_number']}",
+                values=[
+                    [filename],
+                    [str(page["page_number"])],
+                    [page["text"]] if "text" in page else [],
+                    [] if tables is None else [self.format_value(tables)],
+                    [page["error"]] if "error" in page else [],
+                ],
+            )
+
+    def table_row_entities(self, file_uri: str, result: dict) -> Iterator[Entity]:
+        """Yield an entity for each table row of a file result, logging errors."""
+        filename = result["metadata"]["Filename"]
+        if "error" in result["metadata"]:
+            self.log.warning(f"File {filename}: {result['metadata']['error']}")
+        for page in result["pages"]:
+            page_number = page["page_number"]
+            if "error" in page:
+                self.log.warning(f"File {filename}, page {page_number}: {page['error']}")
+            for table_index, table in enumerate(page.get("tables", []), start=1):
+                for row_index, row in enumerate(table, start=1):
+                    columns = row[: self.table_columns]
+                    yield Entity(
+                        uri=f"{file_uri}_{page_number}_{table_index}_{row_index}",
+                        values=[
+                            [filename],
+                            [str(page_number)],
+                            [str(table_index)],
+                            [str(row_index)],
+                            [self.format_value(row)],
+                            *([] if cell is None else [cell] for cell in columns),
+                            *([] for _ in range(self.table_columns - len(columns))),
+                        ],
+                    )
+
+    def format_value(self, value: list) -> str:
+        """Serialize a value of a page entity in the output format."""
+        if self.output_format == OUTPUT_FORMAT_PYTHON:
+            return str(value)
+        return to_json(value)
+
+    def format_output(self, result: dict) -> str:
+        """Serialize a file result in the output format."""
+        if self.output_format == OUTPUT_FORMAT_JSON:
+            return to_json(result)
+        if self.output_format == OUTPUT_FORMAT_JSONL:
+            return "".join(iter_json_lines([result]))
+        return str(result)
+
+    def create_output(self) -> SpooledOutput | ResourceOutput | None:
+        """Create the output of the results of all files, if they are not output separately."""
+        if self.output_resource.endswith(TABLE_OUTPUT_SUFFIXES):
+            return TableResourceOutput(self.context.task.project_id(), self.output_resource)
+        if self.output_resource:
+            return ResourceOutput(self.context.task.project_id(), self.output_resource)
+        if self.all_files == COMBINE:
+            return self.combined_output()
+        return None
+
+    def output_entity(self, output: SpooledOutput | ResourceOutput) -> Entity:
+        """Finish the output of the results of all files and create its entity.
+
+        Results written to a project resource are uploaded, and the entity holds the name of
+        the resource and the number of files, pages and errors.
+        """
+        if isinstance(output, ResourceOutput):
+            output.upload()
+            return Entity(
+                uri=f"{TYPE_URI}_1",
+                values=[
+                    [output.resource_name],
+                    [str(output.files)],
+                    [str(output.pages)],
+                    [str(output.errors)],
+                ],
+            )
+        return Entity(uri=f"{TYPE_URI}_1", values=[[output.getvalue()]])
+
+    def combined_output(self) -> SpooledOutput:
+        """Create the spooled output of the combined file results in the output format.
+
+        The combined results are serialized like a list of file results, or concatenated
+        for JSON Lines.
+        """
+        if self.output_format == OUTPUT_FORMAT_JSONL:
+            return SpooledOutput(self.format_output, max_size=SPOOL_THRESHOLD)
+        separator = "," if self.output_format == OUTPUT_FORMAT_JSON else ", "
+        return SpooledOutput(self.format_output, "[", separator, "]", SPOOL_THRESHOLD)
+
+    def update_report(self, processed: int, stats: RunStatistics) -> None:
+        """Update the execution report with the number of files processed and statistics."""
         self.context.report.update(
             ExecutionReport(
-                entity_count=len(entities),
-                operation_desc=f"file{'' if len(entities) == 1 else 's'} processed",
+                entity_count=processed,
+                operation_desc=f"file{'' if processed == 1 else 's'} processed",
+                summary=stats.summary(reorder_buffer=self.ordered_output),
             )
         )
 
-        if self.all_files == COMBINE:
-            entities = [Entity(uri=f"{TYPE_URI}_1", values=[[str(all_output)]])]
-
-        self.log.info("Finished processing all files")
+    @staticmethod
+    def file_resource_info(resource_info: dict, filename: str, file_origin: str) -> dict | None:
+        """Get the modification timestamp and size of a project file, None for local files."""
+        return resource_info.get(filename) if file_origin == "Project" else None
 
-        return Entities(entities=entities, schema=self.schema)
+    def get_resource_list(self, project_id: str) -> list[dict]:
+        """Get the project resources matching the regex pattern"""
+        return [r for r in get_resources(project_id) if re.fullmatch(self.regex, r["name"])]
 
     def get_file_list(self, project_id: str) -> list:
         """Get file list using regex pattern"""
-        return [r["name"] for r in get_resources(project_id) if re.fullmatch(self.regex, r["name"])]
+        return [r["name"] for r in self.get_resource_list(project_id)]
+
+    @staticmethod
+    def get_resource_info(resources: list[dict]) -> dict:
+        """Get the modification timestamp and size of project resources by name."""
+        return {
+            r["name"]: {"modified": r["modified"], "size": r["size"]}
+            for r in resources
+            if r.get("modified") is not None and r.get("size") is not None
+        }
 
     def execute(self, inputs: Sequence[Entities], context: ExecutionContext) -> Entities:
         """Run the workflow operator."""
@@ -477,11 +1657,18 @@ class PdfExtract(WorkflowPlugin):
                 file = FileEntitySchema().from_entity(entity=entity)
                 filenames.append(file.path)
                 filetypes.append(file.file_type)
-            return self.get_entities(filenames, filetypes)
+            resource_info = (
+                self.get_resource_info(get_resources(context.task.project_id()))
+                if self.incremental and "Project" in filetypes
+                else {}
+            )
+            return self.get_entities(filenames, filetypes, resource_info)
 
         setup_cmempy_user_access(context.user)
-        filenames = self.get_file_list(context.task.project_id())
-        filetype = ["Project" for _ in self.get_file_list(context.task.project_id())]
+        resources = self.get_resource_list(context.task.project_id())
+        filenames = [r["name"] for r in resources]
+        filetype = ["Project" for _ in filenames]
         if not filenames:
             raise FileNotFoundError("No matching files found")
-        return self.get_entities(filenames, filetype)
+        resource_info = self.get_resource_info(resources) if self.incremental else {}
+        return self.get_entities(filenames, filetype, resource_info)
@@ -0,0 +1,130 @@
+"""Statistics of an extraction run"""
+
+from collections import Counter
+from collections.abc import Generator, Hashable
+from contextlib import contextmanager
+from heapq import heappush, heappushpop
+from pathlib import Path
+from time import perf_counter
+from typing import IO
+
+STATS_PAGES = "pages"
+STATS_TABLE_DETECTION_SKIPPED = "table_detection_skipped"
+STATS_IMAGE_ONLY_PAGES = "image_only_pages"
+STATS_OCR_PAGES = "ocr_pages"
+STATS_BYTES = "bytes"
+STATS_TIME_FILE = "time_file"
+STATS_TIME_DOWNLOAD = "time_download"
+STATS_TIME_OPEN = "time_open"
+STATS_TIME_PROBE = "time_probe"
+STATS_TIME_TEXT = "time_text"
+STATS_TIME_TABLES = "time_tables"
+STATS_TIME_RENDER = "time_render"
+STATS_TIME_OCR = "time_ocr"
+STATS_TIME_SERIALIZATION = "time_serialization"
+STATS_REORDER_BUFFER = "reorder_buffer"
+STATS_LABELS = {
+    STATS_PAGES: "Pages processed",
+    STATS_TABLE_DETECTION_SKIPPED: "Pages with table detection skipped",
+    STATS_IMAGE_ONLY_PAGES: "Image-only pages",
+    STATS_OCR_PAGES: "Pages recognized by OCR",
+    STATS_BYTES: "Bytes read",
+    STATS_TIME_DOWNLOAD: "Download time (s)",
+    STATS_TIME_PROBE: "Strategy probe time (s)",
+    STATS_TIME_OPEN: "Open time (s)",
+    STATS_TIME_TEXT: "Text extraction time (s)",
+    STATS_TIME_TABLES: "Table extraction time (s)",
+    STATS_TIME_RENDER: "Page rendering time (s)",
+    STATS_TIME_OCR: "OCR time (s)",
+    STATS_TIME_SERIALIZATION: "Serialization time (s)",
+}
+STATS_REORDER_BUFFER_LABEL = "Maximum files waiting for the input order"
+SLOWEST_COUNT = 5
+
+
+@contextmanager
+def timer(stats: Counter | None, key: Hashable) -> Generator[None]:
+    """Add the time spent in the block to a statistic in seconds, if statistics are given."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.update({key: perf_counter() - start})
+
+
+def source_size(source: str | IO[bytes]) -> int:
+    """Get the size of a file given as a local path or a seekable binary file."""
+    if isinstance(source, str):
+        return Path(source).stat().st_size
+    size = source.seek(0, 2)
+    source.seek(0)
+    return size
+
+
+class RunStatistics:
+    """Aggregate the statistics of the file results of a run for the execution report.
+
+    Counts and phase timings are summed over all files. Throughputs are related to the time
+    elapsed since the start of the run, and the slowest files and pages are kept.
+    """
+
+    def __init__(self, slowest_count: int = SLOWEST_COUNT) -> None:
+        self.counter: Counter = Counter()
+        self.slowest_count = slowest_count
+        self.slowest_files: list[tuple[float, str]] = []
+        self.slowest_pages: list[tuple[float, str, int]] = []
+        self.start = perf_counter()
+
+    def keep_slowest(self, heap: list, item: tuple) -> None:
+        """Add an item to a min-heap of the slowest items, dropping the fastest one if full."""
+        if len(heap) < self.slowest_count:
+            heappush(heap, item)
+        else:
+            heappushpop(heap, item)
+
+    def add(self, filename: str, stats: dict, page_times: dict) -> None:
+        """Add the statistics and page processing times of a file result."""
+        self.counter.update(stats)
+        if STATS_TIME_FILE in stats:
+            self.keep_slowest(self.slowest_files, (stats[STATS_TIME_FILE], filename))
+        for page_number, seconds in page_times.items():
+            self.keep_slowest(self.slowest_pages, (seconds, filename, page_number))
+
+    def summary(self, reorder_buffer: bool = False) -> list[tuple[str, str]]:
+        """Create the execution report summary, with the reorder buffer size if requested."""
+        elapsed = perf_counter() - self.start
+        # timings are summed as seconds, counts as integers
+        summary = [
+            (label, f"{value:.2f}" if isinstance(value, float) else str(value))
+            for label, value in zip(
+                STATS_LABELS.values(), (self.counter[_] for _ in STATS_LABELS), strict=True
+            )
+        ]
+        summary.append(("Pages per second", f"{self.counter[STATS_PAGES] / elapsed:.1f}"))
+        summary.append(("Bytes per second", f"{self.counter[STATS_BYTES] / elapsed:.0f}"))
+        if self.slowest_files:
+            summary.append(
+                (
+                    "Slowest files",
+                    ", ".join(
+                        f"{filename} ({seconds:.2f} s)"
+                        for seconds, filename in sorted(self.slowest_files, reverse=True)
+                    ),
+                )
+            )
+        if self.slowest_pages:
+            summary.append(
+                (
+                    "Slowest pages",
+                    ", ".join(
+                        f"{filename} page {page_number} ({seconds:.2f} s)"
+                        for seconds, filename, page_number in sorted(
+                            self.slowest_pages, reverse=True
+                        )
+                    ),
+                )
+            )
+        if reorder_buffer:
+            summary.append((STATS_REORDER_BUFFER_LABEL, str(self.counter[STATS_REORDER_BUFFER])))
+        return summary
@@ -0,0 +1,224 @@
+"""Automatic selection of the extraction strategies from a fast page probe"""
+
+from itertools import pairwise
+from typing import IO
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+
+from cmem_plugin_pdf_extract.engines import PDFIUM_LOCK
+from cmem_plugin_pdf_extract.extraction_strategies.table_extraction_strategies import (
+    TABLE_EXTRACTION_STRATEGIES,
+)
+from cmem_plugin_pdf_extract.extraction_strategies.text_extraction_strategies import (
+    TEXT_EXTRACTION_STRATEGIES,
+)
+from cmem_plugin_pdf_extract.page_extractor import image_coverage
+
+# strategy setting to choose the preset of each file automatically
+AUTO_SETTING = "auto"
+AUTO_STRATEGY = {AUTO_SETTING: True}
+PROBE_PAGES = 3
+# fonts used by OCR engines for the invisible text layer of scanned pages
+OCR_FONTS = ("GlyphLessFont",)
+# path objects thinner than this are ruling lines, those shorter than the edge_min_length
+# of the presets are ignored, as by the table finder
+LINE_MAX_WIDTH = 2
+LINE_MIN_LENGTH = 3
+# text segments are on the same row if their vertical centers are this close
+ROW_TOLERANCE = 3
+# a row with this many segments separated by wide gaps looks like a borderless table row
+TABLE_ROW_MIN_COLUMNS = 3
+TABLE_COLUMN_MIN_GAP = 10
+TABLE_MIN_ROWS = 3
+# a page with this many wide segments on each side of its center has multiple columns
+COLUMN_MIN_WIDTH = 0.25
+COLUMN_MIN_LINES = 5
+# a page with text that is mostly covered by images is a scan with a text layer
+SCAN_MIN_IMAGE_COVERAGE = 0.9
+
+
+def is_auto(settings: dict) -> bool:
+    """Check whether the settings of a strategy are to be chosen automatically."""
+    return bool(settings.get(AUTO_SETTING))
+
+
+class PageProbe:
+    """Measure the features of a page that the choice of the strategies is based on.
+
+    The measurements are taken with PDFium from the page objects and the text segments,
+    which is much faster than the layout pass of pdfplumber.
+    """
+
+    def __init__(self, page: pdfium.PdfPage) -> None:
+        self.width, self.height = page.get_size()
+        self.text_objects = 0
+        self.ocr_text_objects = 0
+        self.horizontal_edges = 0
+        self.vertical_edges = 0
+        images = []
+        for obj in page.get_objects(
+            filter=[
+                pdfium_c.FPDF_PAGEOBJ_TEXT,
+                pdfium_c.FPDF_PAGEOBJ_PATH,
+                pdfium_c.FPDF_PAGEOBJ_IMAGE,
+            ]
+        ):
+            if obj.type == pdfium_c.FPDF_PAGEOBJ_TEXT:
+                self.text_objects += 1
+                self.ocr_text_objects += self.is_ocr_text(obj)
+            elif obj.type == pdfium_c.FPDF_PAGEOBJ_PATH:
+                self.count_edges(*obj.get_bounds())
+            else:
+                images.append(obj.get_bounds())
+        self.image_coverage = image_coverage(images, (0, 0, self.width, self.height))
+        textpage = page.get_textpage()
+        try:
+            self.chars = textpage.count_chars()
+            segments = [textpage.get_rect(i) for i in range(textpage.count_rects())]
+        finally:
+            textpage.close()
+        self.table_rows = self.count_table_rows(segments)
+        self.multi_column = self.has_multiple_columns(segments)
+
+    @staticmethod
+    def is_ocr_text(obj: pdfium.PdfTextObj) -> bool:
+        """Check whether a text object is part of the invisible text layer of a scan."""
+        if (
+            pdfium_c.FPDFTextObj_GetTextRenderMode(obj.raw)
+            == pdfium_c.FPDF_TEXTRENDERMODE_INVISIBLE
+        ):
+            return True
+        return obj.get_font().get_base_name() in OCR_FONTS
+
+    def count_edges(self, left: float, bottom: float, right: float, top: float) -> None:
+        """Count the edges of a path object as the table finder derives them from it."""
+        width, height = right - left, top - bottom
+        if width <= LINE_MAX_WIDTH and height >= LINE_MIN_LENGTH:
+            self.vertical_edges += 1
+        elif height <= LINE_MAX_WIDTH and width >= LINE_MIN_LENGTH:
+            self.horizontal_edges += 1
+        elif width >= LINE_MIN_LENGTH and height >= LINE_MIN_LENGTH:
+            self.vertical_edges += 2
+            self.horizontal_edges += 2
+
+    @staticmethod
+    def count_table_rows(segments: list[tuple[float, float, float, float]]) -> int:
+        """Count the rows of text segments separated into columns by wide gaps."""
+        rows: list[list[tuple[float, float]]] = []
+        row_center = None
+        for center, left, right in sorted(
+            ((bottom + top) / 2, left, right) for left, bottom, right, top in segments
+        ):
+            if row_center is None or center - row_center > ROW_TOLERANCE:
+                rows.append([])
+                row_center = center
+            rows[-1].append((left, right))
+        count = 0
+        for row in rows:
+            row.sort()
+            columns = 1 + sum(
+                next_left - right >= TABLE_COLUMN_MIN_GAP
+                for (_, right), (next_left, _) in pairwise(row)
+            )
+            count += columns >= TABLE_ROW_MIN_COLUMNS
+        return count
+
+    def has_multiple_columns(self, segments: list[tuple[float, float, float, float]]) -> bool:
+        """Check whether wide lines of text lie on both sides of the center of the page."""
+        center = self.width / 2
+        min_width = self.width * COLUMN_MIN_WIDTH
+        lines = [(left, right) for left, _, right, _ in segments if right - left >= min_width]
+        left_lines = sum(right <= center for _, right in lines)
+        right_lines = sum(left >= center for left, _ in lines)
+        return bool(min(left_lines, right_lines) >= COLUMN_MIN_LINES)
+
+    @property
+    def scanned(self) -> bool:
+        """Check whether the text of the page is the text layer of a scan."""
+        if not self.chars:
+            return False
+        return (
+            self.ocr_text_objects * 2 >= self.text_objects
+            or self.image_coverage >= SCAN_MIN_IMAGE_COVERAGE
+        )
+
+    @property
+    def ruled(self) -> bool:
+        """Check whether the page has enough ruling lines for a table cell."""
+        return min(self.horizontal_edges, self.vertical_edges) >= 2  # noqa: PLR2004
+
+
+def probe_pages(source: str | IO[bytes], page_numbers: list) -> list[PageProbe]:
+    """Probe up to PROBE_PAGES pages of the selection, spread evenly over the document."""
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            page_count = len(pdf)
+            selected = [_ for _ in page_numbers if _ <= page_count] or range(1, page_count + 1)
+            step = max(len(selected) / PROBE_PAGES, 1)
+            probes = []
+            for index in sorted({int(i * step) for i in range(min(PROBE_PAGES, len(selected)))}):
+                page = pdf[selected[index] - 1]
+                try:
+                    probes.append(PageProbe(page))
+                finally:
+                    page.close()
+        finally:
+            pdf.close()
+    if not isinstance(source, str):
+        source.seek(0)
+    return probes
+
+
+def choose_strategies(
+    probes: list[PageProbe], text_auto: bool, table_auto: bool
+) -> tuple[str | None, str | None]:
+    """Choose the cheapest adequate text and table presets for the probed pages.
+
+    - Scanned pages with a text layer are extracted with the "scanned" text preset, pages
+      with multiple columns with the "layout" preset.
+    - Ruling lines select the "lines" table preset, rows of text in columns the "text"
+      preset. Without either, the "lines" preset skips the table detection cheaply.
+    - If both are chosen automatically and no page shows any sign of a table, the text is
+      extracted with the "text_only" preset.
+
+    Returns the names of the presets, or None for those that are not chosen automatically.
+    """
+    text_pages = [_ for _ in probes if _.chars]
+    ruled = any(_.ruled for _ in probes)
+    borderless = any(_.table_rows >= TABLE_MIN_ROWS for _ in probes)
+    table_strategy = None
+    if table_auto:
+        table_strategy = "text" if borderless and not ruled else "lines"
+    text_strategy = None
+    if text_auto:
+        if text_pages and sum(_.scanned for _ in text_pages) * 2 >= len(text_pages):
+            text_strategy = "scanned"
+        elif text_pages and sum(_.multi_column for _ in text_pages) * 2 >= len(text_pages):
+            text_strategy = "layout"
+        elif table_auto and not ruled and not borderless:
+            text_strategy = "text_only"
+        else:
+            text_strategy = "default"
+    return text_strategy, table_strategy
+
+
+def resolve_strategies(
+    source: str | IO[bytes], page_numbers: list, table_settings: dict, text_settings: dict
+) -> tuple[dict, dict, dict]:
+    """Replace automatic strategies by the presets chosen for a file.
+
+    Returns the table and text settings, and the names of the chosen presets as metadata.
+    """
+    text_strategy, table_strategy = choose_strategies(
+        probe_pages(source, page_numbers), is_auto(text_settings), is_auto(table_settings)
+    )
+    chosen = {}
+    if text_strategy:
+        text_settings = TEXT_EXTRACTION_STRATEGIES[text_strategy]
+        chosen["text_strategy"] = text_strategy
+    if table_strategy:
+        table_settings = TABLE_EXTRACTION_STRATEGIES[table_strategy]
+        chosen["table_strategy"] = table_strategy
+    return table_settings, text_settings, chosen
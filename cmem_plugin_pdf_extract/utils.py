@@ -1,10 +1,20 @@
 """Tests"""
 
 import logging
+import os
 import re
 from collections.abc import Generator
 from contextlib import contextmanager
-from io import StringIO
+from contextvars import ContextVar
+from io import BytesIO, StringIO
+from mmap import ACCESS_READ, mmap
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import IO
+
+from cmem.cmempy.workspace.projects.resources.resource import get_resource_response
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 
 
 def validate_page_selection(page_str: str) -> None:
@@ -52,21 +62,124 @@ def parse_page_selection(page_str: str) -> list:
     return sorted(set(pages))
 
 
+class ContextLogHandler(logging.Handler):
+    """Write log records to the stream set in the current context, if any.
+
+    Since every thread runs in its own context, records are routed to the stream of the
+    task that logged them, also when tasks run concurrently.
+    """
+
+    def __init__(self, stream: ContextVar[StringIO | None], level: int = logging.NOTSET):
+        super().__init__(level)
+        self.stream = stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write a record to the stream of the current context."""
+        stream = self.stream.get()
+        if stream is None:
+            return
+        try:
+            stream.write(f"{self.format(record)}\n")
+        except Exception:  # noqa: BLE001
+            self.handleError(record)
+
+
+class LoggerLevelLease:
+    """Lower the level of a shared logger while any thread holds a lease on it.
+
+    The level is restored when the last lease is released, so that the logger is left as it
+    was for other users in the same process.
+    """
+
+    def __init__(self, name: str, level: int):
+        self.logger = logging.getLogger(name)
+        self.level = level
+        self.lock = Lock()
+        self.leases = 0
+        self.restore_level: int | None = None
+
+    def acquire(self) -> None:
+        """Lower the level of the logger, if needed, when the first lease is acquired."""
+        with self.lock:
+            if not self.leases and self.logger.getEffectiveLevel() > self.level:
+                self.restore_level = self.logger.level
+                self.logger.setLevel(self.level)
+            self.leases += 1
+
+    def release(self) -> None:
+        """Restore the level of the logger, if lowered, when the last lease is released."""
+        with self.lock:
+            self.leases -= 1
+            if not self.leases and self.restore_level is not None:
+                self.logger.setLevel(self.restore_level)
+                self.restore_level = None
+
+
+pdfminer_log_stream: ContextVar[StringIO | None] = ContextVar("pdfminer_log_stream", default=None)
+pdfminer_log_handler = ContextLogHandler(pdfminer_log_stream, logging.WARNING)
+pdfminer_log_handler_lock = Lock()
+pdfminer_log_level = LoggerLevelLease("pdfminer", logging.WARNING)
+
+
+def set_environment(environment: dict[str, str]) -> None:
+    """Set environment variables, as initializer of worker processes."""
+    os.environ.update(environment)
+
+
+def install_pdfminer_log_handler() -> None:
+    """Add the context log handler to the pdfminer logger once per process."""
+    logger = logging.getLogger("pdfminer")
+    with pdfminer_log_handler_lock:
+        if pdfminer_log_handler in logger.handlers:
+            return
+        logger.addHandler(pdfminer_log_handler)
+
+
 @contextmanager
 def capture_pdfminer_logs() -> Generator:
-    """Capture pdfminer logs."""
-    level = logging.WARNING
+    """Capture the pdfminer logs of the current thread.
+
+    The pdfminer logger passes on warnings while logs are captured, even if it is configured
+    otherwise.
+    """
+    install_pdfminer_log_handler()
     log_stream = StringIO()
-    handler = logging.StreamHandler(log_stream)
-    handler.setLevel(level)
+    token = pdfminer_log_stream.set(log_stream)
+    pdfminer_log_level.acquire()
+    try:
+        yield log_stream
+    finally:
+        pdfminer_log_level.release()
+        pdfminer_log_stream.reset(token)
 
-    logger = logging.getLogger("pdfminer")
-    original_level = logger.level
-    logger.setLevel(level)
 
-    logger.addHandler(handler)
+@contextmanager
+def spool_resource(project_id: str, resource_name: str, max_size: int) -> Generator[IO[bytes]]:
+    """Download a project resource in chunks.
+
+    The content is kept in memory up to max_size bytes and spooled to a named temporary
+    file on disk above that. The yielded file is positioned at the start.
+    """
+    spooled: IO[bytes] = BytesIO()
     try:
-        yield log_stream
+        with get_resource_response(project_id, resource_name) as response:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if isinstance(spooled, BytesIO) and spooled.tell() + len(chunk) > max_size:
+                    file = NamedTemporaryFile(suffix=".pdf")  # noqa: SIM115
+                    file.write(spooled.getbuffer())
+                    spooled = file
+                spooled.write(chunk)
+        spooled.seek(0)
+        yield spooled
     finally:
-        logger.removeHandler(handler)
-        logger.setLevel(original_level)
+        spooled.close()
+
+
+@contextmanager
+def memory_map(file: IO[bytes]) -> Generator[IO[bytes] | mmap]:
+    """Memory-map a file on disk. In-memory files are yielded as they are."""
+    if isinstance(file, BytesIO):
+        yield file
+        return
+    with mmap(file.fileno(), 0, access=ACCESS_READ) as mapped:
+        yield mapped
@@ -0,0 +1,321 @@
+"""Benchmark of the extraction pipeline on a generated corpus of local PDF files.
+
+Run with `python -m tests.benchmark`. No Corporate Memory instance is needed, since all
+files are processed with the file origin "Local".
+
+Every text and table extraction strategy is run on each document of the corpus in a fresh
+worker process, so that the peak resident set size of the process can be attributed to the
+run. The text strategies are combined with the default table strategy and vice versa, and
+the cost of a strategy is the time spent in its extraction phase per page. Finally, the whole
+corpus is processed with get_entities to measure the throughput of the pipeline.
+"""
+
+# the results are printed as they are measured
+# ruff: noqa: T201
+
+import argparse
+import json
+import resource
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from io import BytesIO
+from pathlib import Path
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from PIL import Image
+
+from cmem_plugin_pdf_extract.engines import ENGINE_PDFIUM, ENGINE_PDFPLUMBER
+from cmem_plugin_pdf_extract.extraction_strategies.table_extraction_strategies import (
+    TABLE_EXTRACTION_STRATEGIES,
+)
+from cmem_plugin_pdf_extract.extraction_strategies.text_extraction_strategies import (
+    TEXT_EXTRACTION_STRATEGIES,
+)
+from cmem_plugin_pdf_extract.pdf_extract import IGNORE, TABLE_LINES, TEXT_DEFAULT, PdfExtract
+from tests.utils import TestLocalExecutionContext
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+WORDS = [
+    "lorem",
+    "ipsum",
+    "dolor",
+    "sit",
+    "amet",
+    "consectetur",
+    "adipiscing",
+    "elit",
+    "sed",
+    "do",
+    "eiusmod",
+    "tempor",
+    "incididunt",
+    "ut",
+    "labore",
+    "et",
+    "dolore",
+    "magna",
+    "aliqua",
+]
+
+
+def build_pdf(pages: list[tuple[str, bytes | None]]) -> bytes:
+    """Build a PDF document from page content streams and optional JPEG images.
+
+    Each page uses the font /F1 (Helvetica) and, if an image is given, the XObject /Im1 of
+    its size in pixels.
+    """
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # the page tree is added once the page objects are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for content, image in pages:
+        xobjects = b""
+        if image is not None:
+            width, height = Image.open(BytesIO(image)).size
+            objects.append(
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode "
+                f"/Length {len(image)} >>\nstream\n".encode()
+                + image
+                + b"\nendstream"
+            )
+            xobjects = f"/XObject << /Im1 {len(objects)} 0 R >> ".encode()
+        stream = content.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%b\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> %b>> >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, len(objects), xobjects)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{_} 0 R" for _ in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    pdf = bytearray(b"%PDF-1.7\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%b\nendobj\n" % (number, obj)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % _ for _ in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(pdf)
+
+
+def text_lines(lines: list[tuple[int, int, str]], size: int = 10) -> str:
+    """Create the content stream operators writing lines of text at positions."""
+    return "".join(f"BT /F1 {size} Tf {x} {y} Td ({text}) Tj ET\n" for x, y, text in lines)
+
+
+def paragraph_page(random: Random, line_count: int = 60) -> str:
+    """Create a page of running text."""
+    return text_lines(
+        [
+            (50, PAGE_HEIGHT - 50 - 12 * _, " ".join(random.choices(WORDS, k=12)))
+            for _ in range(line_count)
+        ]
+    )
+
+
+def table_page(random: Random, rows: int, columns: int, ruled: bool) -> str:
+    """Create a page with a table, with ruling lines for a lattice table or without."""
+    x0, top, width, height = 50, PAGE_HEIGHT - 100, 90, 20
+    cells = [
+        (x0 + column * width + 4, top - (row + 1) * height + 6, random.choice(WORDS))
+        for row in range(rows)
+        for column in range(columns)
+    ]
+    content = text_lines([(50, PAGE_HEIGHT - 70, "Table caption")], size=12)
+    content += text_lines(cells)
+    if ruled:
+        bottom, right = top - rows * height, x0 + columns * width
+        content += "0.5 w\n"
+        content += "".join(
+            f"{x0} {top - _ * height} m {right} {top - _ * height} l S\n" for _ in range(rows + 1)
+        )
+        content += "".join(
+            f"{x0 + _ * width} {top} m {x0 + _ * width} {bottom} l S\n" for _ in range(columns + 1)
+        )
+    return content
+
+
+def image_page(random: Random, size: int) -> tuple[str, bytes]:
+    """Create a page with a large noise image and a caption."""
+    image = Image.effect_noise((size, size), 64).convert("RGB")
+    jpeg = BytesIO()
+    image.save(jpeg, "JPEG", quality=90)
+    content = "q 495 0 0 495 50 250 cm /Im1 Do Q\n" + text_lines(
+        [(50, 200, " ".join(random.choices(WORDS, k=8)))]
+    )
+    return content, jpeg.getvalue()
+
+
+def generate_corpus(directory: Path, scale: int = 1) -> list[Path]:
+    """Generate the benchmark corpus, with the number of pages multiplied by the scale."""
+    # a seeded generator, so that the corpus is the same on every run
+    random = Random(0)  # noqa: S311
+    documents: dict[str, list[tuple[str, bytes | None]]] = {
+        "text_only": [(paragraph_page(random), None) for _ in range(20 * scale)],
+        "lattice_tables": [
+            (table_page(random, rows=25, columns=5, ruled=True), None) for _ in range(10 * scale)
+        ],
+        "sparse_tables": [
+            (table_page(random, rows=25, columns=5, ruled=False), None) for _ in range(10 * scale)
+        ],
+        "many_pages": [(paragraph_page(random, line_count=5), None) for _ in range(200 * scale)],
+        "large_images": [image_page(random, size=2000) for _ in range(5 * scale)],
+    }
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, pages in documents.items():
+        path = directory / f"{name}.pdf"
+        path.write_bytes(build_pdf(pages))
+        paths.append(path)
+    return paths
+
+
+def reset_peak_rss() -> None:
+    """Reset the peak resident set size of the current process to its current size (Linux).
+
+    Without a reset, the peak includes the memory used while importing the modules.
+    """
+    with suppress(OSError):
+        Path("/proc/self/clear_refs").write_text("5", encoding="ascii")
+
+
+def peak_rss() -> int:
+    """Get the peak resident set size of the current process in bytes (Linux)."""
+    with suppress(OSError):
+        for line in Path("/proc/self/status").read_text(encoding="ascii").splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_worker(
+    path: str, text_strategy: str, table_strategy: str, engine: str = ENGINE_PDFPLUMBER
+) -> dict:
+    """Extract a file with the worker of the plugin, measuring time and memory."""
+    reset_peak_rss()
+    start = perf_counter()
+    result = PdfExtract.extract_pdf_data_worker(
+        path,
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES[table_strategy],
+        TEXT_EXTRACTION_STRATEGIES[text_strategy],
+        IGNORE,
+        "Local",
+        engine=engine,
+    )
+    return {
+        "seconds": perf_counter() - start,
+        "pages": len(result["pages"]),
+        "peak_rss": peak_rss(),
+        "stats": result["stats"],
+    }
+
+
+def run_pipeline(paths: list[str], max_processes: int, executor_backend: str) -> dict:
+    """Process all files with get_entities, measuring time and memory."""
+    plugin = PdfExtract(
+        regex="",
+        error_handling=IGNORE,
+        max_processes=max_processes,
+        executor_backend=executor_backend,
+    )
+    plugin.context = TestLocalExecutionContext()
+    reports: list = []
+    plugin.context.report.update = reports.append  # type: ignore[method-assign]
+    reset_peak_rss()
+    start = perf_counter()
+    for _ in plugin.get_entities(paths, ["Local"] * len(paths)).entities:
+        pass
+    return {
+        "seconds": perf_counter() - start,
+        "peak_rss": peak_rss(),
+        "summary": dict(reports[-1].summary),
+    }
+
+
+def isolated(function: Callable, *args: object) -> dict:
+    """Run a function in a fresh worker process, so that its peak memory is its own."""
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        return executor.submit(function, *args).result()  # type: ignore[no-any-return]
+
+
+def run_benchmark(paths: list[Path], max_processes: int) -> dict:
+    """Run the strategy and pipeline benchmarks, printing the results as they are measured."""
+    cases = [(TEXT_DEFAULT, _, "tables", ENGINE_PDFPLUMBER) for _ in TABLE_EXTRACTION_STRATEGIES]
+    cases += [(_, TABLE_LINES, "text", ENGINE_PDFPLUMBER) for _ in TEXT_EXTRACTION_STRATEGIES]
+    cases.append((TEXT_DEFAULT, TABLE_LINES, "text", ENGINE_PDFIUM))
+    results: dict = {"strategies": [], "pipeline": []}
+    print(
+        f"{'document':<16} {'engine':<10} {'text':<9} {'table':<9} {'pages/s':>9} {'ms/page':>9} "
+        f"{'peak RSS MB':>12}"
+    )
+    for path in paths:
+        for text_strategy, table_strategy, phase, engine in cases:
+            run = isolated(run_worker, str(path), text_strategy, table_strategy, engine)
+            # the cost of the strategy under test is the time of its extraction phase
+            cost = run["stats"].get(f"time_{phase}", 0) / max(run["pages"], 1)
+            results["strategies"].append(
+                {
+                    "document": path.stem,
+                    "engine": engine,
+                    "text_strategy": text_strategy,
+                    "table_strategy": table_strategy,
+                    "pages_per_second": run["pages"] / run["seconds"],
+                    "strategy_seconds_per_page": cost,
+                    "peak_rss": run["peak_rss"],
+                }
+            )
+            print(
+                f"{path.stem:<16} {engine:<10} {text_strategy:<9} {table_strategy:<9} "
+                f"{run['pages'] / run['seconds']:>9.1f} {cost * 1000:>9.1f} "
+                f"{run['peak_rss'] / 1024 / 1024:>12.1f}"
+            )
+    for executor_backend in ("threads", "processes"):
+        run = isolated(run_pipeline, [str(_) for _ in paths], max_processes, executor_backend)
+        results["pipeline"].append({"executor_backend": executor_backend, **run})
+        print(
+            f"\nget_entities with {max_processes} {executor_backend}: "
+            f"{run['summary']['Pages per second']} pages/s, "
+            f"{run['summary']['Bytes per second']} bytes/s, "
+            f"peak RSS {run['peak_rss'] / 1024 / 1024:.1f} MB"
+        )
+    return results
+
+
+def main() -> None:
+    """Generate the corpus and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--corpus", type=Path, help="directory to write the corpus to, a temporary one if not set"
+    )
+    parser.add_argument("--scale", type=int, default=1, help="multiplier of the page counts")
+    parser.add_argument(
+        "--processes", type=int, default=4, help="number of workers of the pipeline benchmark"
+    )
+    parser.add_argument("--json", type=Path, help="file to write the results to as JSON")
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        paths = generate_corpus(args.corpus or Path(directory), args.scale)
+        results = run_benchmark(paths, args.processes)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -311,7 +311,6 @@ FILE_CORRUPTED_RESULT_2 = {
             "page_number": 1,
             "text": "",
             "tables": [],
-            "error": "Text extraction error: Data-loss while decompressing corrupted data",
         }
     ],
 }
@@ -1,10 +1,27 @@
 """Plugin tests."""
 
+import gzip
 import json
+import logging
+import os
+import pickle
+import re
+import shutil
+import sys
+import tracemalloc
 from ast import literal_eval
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from io import BytesIO
+from pathlib import Path
+from random import Random
+from threading import Barrier
+from time import sleep
 from typing import Any
+from unittest.mock import ANY
 
+import pypdfium2 as pdfium
 import pytest
 from cmem_plugin_base.dataintegration.entity import Entities, EntityPath
 from cmem_plugin_base.dataintegration.typed_entities.file import (
@@ -13,17 +30,39 @@ from cmem_plugin_base.dataintegration.typed_entities.file import (
     LocalFile,
     ProjectFile,
 )
+from pdfplumber import open as pdfplumber_open
 from pdfplumber.utils.exceptions import PdfminerException
 from yaml import YAMLError, safe_load
 
+from cmem_plugin_pdf_extract.cache import ResultCache
+from cmem_plugin_pdf_extract.engines import PdfiumDocument, PdfplumberDocument
 from cmem_plugin_pdf_extract.extraction_strategies.table_extraction_strategies import (
     TABLE_EXTRACTION_STRATEGIES,
 )
 from cmem_plugin_pdf_extract.extraction_strategies.text_extraction_strategies import (
     TEXT_EXTRACTION_STRATEGIES,
 )
+from cmem_plugin_pdf_extract.output import SpooledOutput, iter_json_lines
+from cmem_plugin_pdf_extract.page_extractor import PageExtractor
 from cmem_plugin_pdf_extract.pdf_extract import PdfExtract
-from cmem_plugin_pdf_extract.utils import parse_page_selection
+from cmem_plugin_pdf_extract.utils import (
+    capture_pdfminer_logs,
+    memory_map,
+    parse_page_selection,
+    pdfminer_log_handler,
+    spool_resource,
+)
+from tests.benchmark import (
+    PAGE_HEIGHT,
+    PAGE_WIDTH,
+    build_pdf,
+    generate_corpus,
+    image_page,
+    paragraph_page,
+    run_worker,
+    table_page,
+    text_lines,
+)
 from tests.results import (
     CUSTOM_TABLE_STRATEGY_SETTING,
     FILE_1_RESULT,
@@ -35,7 +74,12 @@ from tests.results import (
     FILE_PAGES_NOT_EXIST_RESULT,
     UUID4,
 )
-from tests.utils import TestExecutionContext, TestPluginContext
+from tests.utils import (
+    TestExecutionContext,
+    TestLocalExecutionContext,
+    TestPluginContext,
+    TestResourceResponse,
+)
 
 from .conftest import PROJECT_ID, TYPE_URI, TestingEnvironment
 
@@ -61,11 +105,12 @@ def test_one_entity_per_file(testing_env_valid: TestingEnvironment) -> None:
     plugin = testing_env_valid.extract_plugin
     entities = plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
 
-    entities.entities = sorted(entities.entities, key=lambda x: x.uri)
+    # sort by the file name after the input index
+    entities.entities = sorted(entities.entities, key=lambda x: x.uri.split("_", 2)[2])
 
     assert entities.schema.paths == [EntityPath("pdf_extract_output")]
-    assert entities.entities[0].uri == f"{TYPE_URI}_1"
-    assert entities.entities[1].uri == f"{TYPE_URI}_2"
+    assert entities.entities[0].uri.endswith(f"_{UUID4}_1.pdf")
+    assert entities.entities[1].uri.endswith(f"_{UUID4}_2.pdf")
     assert len(entities.entities) == 2  # noqa: PLR2004
     assert literal_eval(entities.entities[0].values[0][0]) == FILE_1_RESULT
     assert literal_eval(entities.entities[1].values[0][0]) == FILE_2_RESULT
@@ -77,6 +122,8 @@ def test_one_entity(testing_env_valid: TestingEnvironment) -> None:
     plugin.all_files = "combine"
     entities = plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
 
+    entities.entities = list(entities.entities)
+
     assert entities.schema.paths == [EntityPath("pdf_extract_output")]
     assert entities.entities[0].uri == f"{TYPE_URI}_1"
     assert len(entities.entities) == 1
@@ -90,7 +137,7 @@ def test_table_strategy_text(testing_env_valid: TestingEnvironment) -> None:
     plugin = testing_env_valid.extract_plugin
     plugin.all_files = "combine"
     plugin.table_strategy = TABLE_EXTRACTION_STRATEGIES["text"]
-    plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
+    list(plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID)).entities)
 
 
 def test_page_selection(testing_env_page_selection: TestingEnvironment) -> None:
@@ -101,7 +148,7 @@ def test_page_selection(testing_env_page_selection: TestingEnvironment) -> None:
     plugin.page_numbers = parse_page_selection("1,3-5,8-10")
     entities = plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
 
-    assert literal_eval(entities.entities[0].values[0][0]) == FILE_3_RESULT
+    assert literal_eval(next(entities.entities).values[0][0]) == FILE_3_RESULT
 
 
 def test_page_selection_not_exist(testing_env_page_selection: TestingEnvironment) -> None:
@@ -112,7 +159,7 @@ def test_page_selection_not_exist(testing_env_page_selection: TestingEnvironment
     plugin.page_numbers = parse_page_selection("8")
     entities = plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
 
-    assert literal_eval(entities.entities[0].values[0][0]) == FILE_PAGES_NOT_EXIST_RESULT
+    assert literal_eval(next(entities.entities).values[0][0]) == FILE_PAGES_NOT_EXIST_RESULT
 
 
 def test_invalid_pdf_1(testing_env_corrupted: TestingEnvironment) -> None:
@@ -124,14 +171,14 @@ def test_invalid_pdf_1(testing_env_corrupted: TestingEnvironment) -> None:
     plugin.error_handling = "ignore"
     entities = plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
 
-    assert literal_eval(entities.entities[0].values[0][0]) == FILE_CORRUPTED_RESULT_1
+    assert literal_eval(next(entities.entities).values[0][0]) == FILE_CORRUPTED_RESULT_1
 
     plugin.error_handling = "raise_on_error"
 
     with pytest.raises(
         PdfminerException, match=f"File {filename}: No /Root object! - Is this really a PDF?"
     ):
-        plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
+        list(plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID)).entities)
 
 
 def test_invalid_pdf_2(testing_env_corrupted: TestingEnvironment) -> None:
@@ -142,16 +189,13 @@ def test_invalid_pdf_2(testing_env_corrupted: TestingEnvironment) -> None:
     plugin.table_strategy = TABLE_EXTRACTION_STRATEGIES["lines"]
     entities = plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
 
-    assert literal_eval(entities.entities[0].values[0][0]) == FILE_CORRUPTED_RESULT_2
+    assert literal_eval(next(entities.entities).values[0][0]) == FILE_CORRUPTED_RESULT_2
 
+    # pdfminer.six drops the corrupted content stream without a warning
     plugin.error_handling = "raise_on_error_and_warning"
+    entities = plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
 
-    with pytest.raises(
-        ValueError,
-        match=f"File {filename}, page 1: Text extraction error: Data-loss while decompressing "
-        f"corrupted data",
-    ):
-        plugin.execute(inputs=[], context=TestExecutionContext(PROJECT_ID))
+    assert literal_eval(next(entities.entities).values[0][0]) == FILE_CORRUPTED_RESULT_2
 
 
 def test_custom_table_strategy_parameter() -> None:
@@ -214,7 +258,7 @@ def test_input_port_pdf(testing_env_valid: TestingEnvironment) -> None:
 
     results = plugin.execute(inputs=[input_entities], context=TestExecutionContext())
 
-    assert literal_eval(results.entities[0].values[0][0]) == FILE_1_RESULT_INPUT
+    assert literal_eval(next(results.entities).values[0][0]) == FILE_1_RESULT_INPUT
 
 
 def test_text_extraction_strategies(testing_env_valid: TestingEnvironment) -> None:
@@ -284,3 +328,1150 @@ def test_different_file_type_inputs(testing_env_valid: TestingEnvironment) -> No
     plugin = testing_env_valid.extract_plugin
     result = plugin.execute(inputs=[input_entities], context=TestExecutionContext(PROJECT_ID))
     assert len(list(result.entities)) == len(files)
+
+
+@pytest.mark.parametrize("executor_backend", ["threads", "processes"])
+def test_executor_backend(executor_backend: str) -> None:
+    """Test extraction of local files with thread and process executors"""
+    plugin = PdfExtract(regex="", executor_backend=executor_backend, max_processes=2)
+    plugin.context = TestLocalExecutionContext()
+    result = plugin.get_entities(["tests/test_1.pdf", "tests/test_1.pdf"], ["Local", "Local"])
+
+    entities = list(result.entities)
+
+    assert len(entities) == 2  # noqa: PLR2004
+    for entity in entities:
+        assert literal_eval(entity.values[0][0]) == FILE_1_RESULT_INPUT
+
+
+def test_executor_worker_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that worker processes are not forked and receive the environment of cmempy"""
+    environment = {
+        "CMEM_BASE_URI": "http://cmem.example",
+        "CMEMC_CUSTOM_HEADER_X_TENANT": "example",
+        "KEYCLOAK_REALM_ID": "example",
+    }
+    plugin = PdfExtract(regex="", executor_backend="processes", max_processes=1)
+    # the server process of the workers is started before the environment is set up
+    with plugin.create_executor() as executor:
+        executor.submit(os.getpid).result()
+    for name, value in environment.items():
+        monkeypatch.setenv(name, value)
+    with plugin.create_executor() as executor:
+        for name, value in environment.items():
+            assert executor.submit(os.getenv, name).result() == value
+        assert executor._mp_context.get_start_method() != "fork"  # type: ignore[attr-defined]  # noqa: SLF001
+
+
+@pytest.mark.parametrize("output_mode", ["file", "page", "table_row"])
+def test_unique_entity_uris(output_mode: str) -> None:
+    """Test that the entities of inputs with the same name have different URIs"""
+    plugin = PdfExtract(regex="", output_mode=output_mode, max_processes=2)
+    plugin.context = TestLocalExecutionContext()
+    entities = list(
+        plugin.get_entities(["tests/test_1.pdf", "tests/test_1.pdf"], ["Local", "Local"]).entities
+    )
+    uris = [entity.uri for entity in entities]
+    assert len(uris) > 1
+    assert len(set(uris)) == len(uris)
+
+
+def test_stable_entity_uris() -> None:
+    """Test that the URI of a file only depends on its origin, name and repetitions"""
+    assert PdfExtract.file_uris(["a.pdf"], ["Local"]) == [f"{TYPE_URI}_Local_a.pdf"]
+    assert PdfExtract.file_uris(
+        ["b.pdf", "a.pdf", "dir/a.pdf", "a.pdf", "a.pdf"],
+        ["Local", "Local", "Local", "Project", "Local"],
+    ) == [
+        f"{TYPE_URI}_Local_b.pdf",
+        f"{TYPE_URI}_Local_a.pdf",
+        f"{TYPE_URI}_Local_dir%2Fa.pdf",
+        f"{TYPE_URI}_Project_a.pdf",
+        f"{TYPE_URI}_Local_a.pdf(2)",
+    ]
+
+
+def test_invalid_executor_backend() -> None:
+    """Test invalid executor backend"""
+    with pytest.raises(ValueError, match="Invalid executor backend: wrong"):
+        PdfExtract(regex="test", executor_backend="wrong")
+
+
+@pytest.mark.parametrize("executor_backend", ["threads", "processes"])
+def test_page_chunk_size(executor_backend: str) -> None:
+    """Test page-level parallel processing against processing the file as a whole"""
+    plugin = PdfExtract(
+        regex="", page_selection="1,3-5,8-10", executor_backend=executor_backend, max_processes=2
+    )
+    expected = PdfExtract.extract_pdf_data_worker(
+        "tests/test_3.pdf",
+        plugin.page_numbers,
+        "",
+        plugin.table_strategy,
+        plugin.text_strategy,
+        plugin.error_handling,
+        "Local",
+    )
+    expected.pop("stats")
+    expected.pop("page_times")
+
+    plugin.page_chunk_size = 2
+    plugin.context = TestLocalExecutionContext()
+    result = plugin.get_entities(["tests/test_3.pdf"], ["Local"])
+
+    assert literal_eval(next(result.entities).values[0][0]) == expected
+
+
+def test_streaming_entities(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that entities are yielded lazily with a bounded number of files in flight"""
+    submitted: list[str] = []
+    worker = PdfExtract.extract_pdf_data_worker
+
+    def counting_worker(filename: str, *args: Any, **kwargs: Any) -> dict:  # noqa: ANN401
+        submitted.append(filename)
+        return worker(filename, *args, **kwargs)
+
+    monkeypatch.setattr(PdfExtract, "extract_pdf_data_worker", staticmethod(counting_worker))
+    plugin = PdfExtract(regex="", max_processes=1)
+    plugin.context = TestLocalExecutionContext()
+    result = plugin.get_entities(["tests/test_1.pdf"] * 10, ["Local"] * 10)
+    assert submitted == []
+
+    entity = next(result.entities)
+    assert literal_eval(entity.values[0][0]) == FILE_1_RESULT_INPUT
+    assert len(submitted) <= 2 * plugin.max_processes
+    assert len(list(result.entities)) == 9  # noqa: PLR2004
+
+    submitted.clear()
+    plugin.max_files_in_flight = 5
+    result = plugin.get_entities(["tests/test_1.pdf"] * 10, ["Local"] * 10)
+    next(result.entities)
+    assert 1 < len(submitted) <= 5  # noqa: PLR2004
+    assert len(list(result.entities)) == 9  # noqa: PLR2004
+
+
+def test_ordered_output(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that results are output in the input order with stable URIs"""
+    filenames = []
+    for name in ("b", "a", "d", "c"):
+        path = tmp_path / f"{name}.pdf"
+        shutil.copy("tests/test_1.pdf", path)
+        filenames.append(str(path))
+    worker = PdfExtract.extract_pdf_data_worker
+
+    def delayed_worker(filename: str, *args: Any, **kwargs: Any) -> dict:  # noqa: ANN401
+        if filename == filenames[0]:
+            sleep(1)
+        return worker(filename, *args, **kwargs)
+
+    monkeypatch.setattr(PdfExtract, "extract_pdf_data_worker", staticmethod(delayed_worker))
+    uris = PdfExtract.file_uris(filenames, ["Local"] * 4)
+
+    plugin = PdfExtract(regex="", max_processes=4)
+    plugin.context = TestLocalExecutionContext()
+    entities = list(plugin.get_entities(filenames, ["Local"] * 4).entities)
+    assert sorted(entity.uri for entity in entities) == sorted(uris)
+    assert entities[-1].uri == uris[0]
+
+    reports: list = []
+    plugin = PdfExtract(regex="", max_processes=4, ordered_output=True)
+    plugin.context = TestLocalExecutionContext()
+    plugin.context.report.update = reports.append  # type: ignore[method-assign]
+    entities = list(plugin.get_entities(filenames, ["Local"] * 4).entities)
+    assert [entity.uri for entity in entities] == uris
+    label, value = reports[-1].summary[-1]
+    assert label == "Maximum files waiting for the input order"
+    assert int(value) >= 1
+
+
+def test_invalid_max_files_in_flight() -> None:
+    """Test invalid maximum number of files in flight"""
+    with pytest.raises(ValueError, match="Invalid maximum number of files in flight: -1"):
+        PdfExtract(regex="test", max_files_in_flight=-1)
+
+
+def test_result_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that cached results are returned for files with the same content"""
+    copied_file = tmp_path / "copy.pdf"
+    shutil.copy("tests/test_1.pdf", copied_file)
+    plugin = PdfExtract(regex="", cache_directory=str(tmp_path / "cache"), max_processes=1)
+    plugin.context = TestLocalExecutionContext()
+    result = plugin.get_entities(["tests/test_1.pdf"], ["Local"])
+    assert literal_eval(next(result.entities).values[0][0]) == FILE_1_RESULT_INPUT
+
+    def fail(*_: Any) -> None:  # noqa: ANN401
+        raise AssertionError("file was parsed again")
+
+    monkeypatch.setattr("cmem_plugin_pdf_extract.engines.pdfplumber_open", fail)
+    result = plugin.get_entities([str(copied_file)], ["Local"])
+    cached = literal_eval(next(result.entities).values[0][0])
+    assert cached["metadata"]["Filename"] == str(copied_file)
+    assert cached["pages"] == FILE_1_RESULT_INPUT["pages"]
+
+    plugin.text_strategy = TEXT_EXTRACTION_STRATEGIES["raw"]
+    with pytest.raises(AssertionError, match="file was parsed again"):
+        list(plugin.get_entities([str(copied_file)], ["Local"]).entities)
+
+
+def test_result_cache_eviction(tmp_path: Path) -> None:
+    """Test that the least recently used cache entries are evicted"""
+    cache = ResultCache(tmp_path, max_size=1000)
+    keys = [ResultCache.key(str(i)) for i in range(3)]
+    value = "x" * 400
+    for i, key in enumerate(keys):
+        cache.put(key, value)
+        os.utime(cache.path(key), (i, i))
+    assert cache.get(keys[0]) == value
+    # only one entry needs to be removed to fit the cache
+    cache.max_size = sum(cache.path(key).stat().st_size for key in keys) - 1
+    # files that the cache does not own are kept
+    other_path = cache.path(keys[0]).with_name("other.pickle")
+    other_path.write_text(value)
+
+    cache.evict()
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+    assert other_path.exists()
+
+
+def test_result_cache_untrusted_entries(tmp_path: Path) -> None:
+    """Test that cache entries are stored as JSON and other content is not loaded"""
+    cache = ResultCache(tmp_path, max_size=1000)
+    key = ResultCache.key("0")
+    cache.put(key, {"pages": [{"page_number": 1, "tables": [[["a", None]]]}]})
+    assert json.loads(gzip.decompress(cache.path(key).read_bytes())) == cache.get(key)
+
+    cache.path(key).write_bytes(pickle.dumps(Counter()))
+    assert cache.get(key) is None
+
+
+def test_incremental(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that unchanged project files are served from the cache without downloading"""
+    downloads: list[str] = []
+    content = Path("tests/test_1.pdf").read_bytes()
+
+    def get_resource_response(_: str, resource_name: str) -> TestResourceResponse:
+        downloads.append(resource_name)
+        return TestResourceResponse(content)
+
+    monkeypatch.setattr(
+        "cmem_plugin_pdf_extract.utils.get_resource_response", get_resource_response
+    )
+    plugin = PdfExtract(regex="", cache_directory=str(tmp_path), incremental=True, max_processes=1)
+    plugin.context = TestLocalExecutionContext()
+    resource_info = PdfExtract.get_resource_info(
+        [
+            {"name": "a.pdf", "modified": "2025-01-01T00:00:00Z", "size": 1},
+            {"name": "b.pdf", "modified": None, "size": 1},
+        ]
+    )
+    assert resource_info == {"a.pdf": {"modified": "2025-01-01T00:00:00Z", "size": 1}}
+
+    first = list(plugin.get_entities(["a.pdf"], ["Project"], resource_info).entities)
+    second = list(plugin.get_entities(["a.pdf"], ["Project"], resource_info).entities)
+    assert downloads == ["a.pdf"]
+    assert first[0].values == second[0].values
+
+    resource_info["a.pdf"]["size"] = 2
+    list(plugin.get_entities(["a.pdf"], ["Project"], resource_info).entities)
+    assert downloads == ["a.pdf", "a.pdf"]
+
+    # a local file with the name of a project resource does not use or change its manifest entry
+    shutil.copy("tests/test_2.pdf", tmp_path / "a.pdf")
+    monkeypatch.chdir(tmp_path)
+    local = list(plugin.get_entities(["a.pdf"], ["Local"], resource_info).entities)
+    assert local[0].values != first[0].values
+    list(plugin.get_entities(["a.pdf"], ["Project"], resource_info).entities)
+    assert downloads == ["a.pdf", "a.pdf"]
+
+    with pytest.raises(ValueError, match="Incremental processing requires a cache directory"):
+        PdfExtract(regex="test", incremental=True)
+
+
+def test_spool_resource(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test spooling of project resources to memory or to a temporary file"""
+    content = Path("tests/test_1.pdf").read_bytes()
+    monkeypatch.setattr(
+        "cmem_plugin_pdf_extract.utils.get_resource_response",
+        lambda *_: TestResourceResponse(content),
+    )
+    with spool_resource("project", "test_1.pdf", len(content)) as spooled:
+        assert isinstance(spooled, BytesIO)
+        assert spooled.read() == content
+
+    with spool_resource("project", "test_1.pdf", 1000) as spooled:
+        assert not isinstance(spooled, BytesIO)
+        assert Path(spooled.name).read_bytes() == content
+        with memory_map(spooled) as mapped, pdfplumber_open(mapped) as pdf:  # type: ignore[arg-type]
+            assert len(pdf.pages) == 2  # noqa: PLR2004
+    assert not Path(spooled.name).exists()
+
+    plugin = PdfExtract(regex="", page_chunk_size=1, max_processes=2)
+    plugin.context = TestLocalExecutionContext()
+    result = literal_eval(next(plugin.get_entities(["1.pdf"], ["Project"]).entities).values[0][0])
+    assert result["pages"] == FILE_1_RESULT_INPUT["pages"]
+
+
+def test_bounded_memory_many_pages(tmp_path: Path) -> None:
+    """Test that the memory does not grow with the number of pages of a document"""
+    source = pdfium.PdfDocument("tests/test_1.pdf")
+    peaks = []
+    for copies in (2, 8):
+        document = pdfium.PdfDocument.new()
+        for _ in range(copies):
+            document.import_pages(source)
+        path = tmp_path / f"{copies}.pdf"
+        document.save(path)
+
+        tracemalloc.start()
+        result = PdfExtract.extract_pdf_data_worker(
+            str(path),
+            [],
+            "",
+            TABLE_EXTRACTION_STRATEGIES["lines"],
+            TEXT_EXTRACTION_STRATEGIES["default"],
+            "raise_on_error",
+            "Local",
+        )
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert len(result["pages"]) == copies * 2
+
+    assert peaks[1] < 2 * peaks[0]
+
+
+@pytest.mark.parametrize("table_strategy", TABLE_EXTRACTION_STRATEGIES)
+def test_page_extractor(table_strategy: str) -> None:
+    """Test that the combined page extraction equals the separate pdfplumber extraction"""
+    for filename in ("tests/test_1.pdf", "tests/test_2.pdf", "tests/test_3.pdf"):
+        with pdfplumber_open(filename) as pdf:
+            for page in pdf.pages:
+                for text_settings in TEXT_EXTRACTION_STRATEGIES.values():
+                    table_settings = TABLE_EXTRACTION_STRATEGIES[table_strategy]
+                    extractor = PageExtractor(page)
+                    assert extractor.extract_text(**deepcopy(text_settings)) == page.extract_text(
+                        **deepcopy(text_settings)
+                    )
+                    assert extractor.extract_tables(
+                        deepcopy(table_settings)
+                    ) == page.extract_tables(deepcopy(table_settings))
+
+
+def test_text_only() -> None:
+    """Test that the text-only extraction equals the text of all presets without tables"""
+    for filename in ("tests/test_1.pdf", "tests/test_2.pdf", "tests/test_3.pdf"):
+        with pdfplumber_open(filename) as pdf:
+            for page in pdf.pages:
+                for text_settings in TEXT_EXTRACTION_STRATEGIES.values():
+                    extractor = PageExtractor(page, text_only=True)
+                    assert extractor.extract_text(**deepcopy(text_settings)) == page.extract_text(
+                        **deepcopy(text_settings)
+                    )
+                    assert extractor.extract_tables(TABLE_EXTRACTION_STRATEGIES["lines"]) == []
+                    assert extractor.table_detection_skipped
+
+    result = PdfExtract.extract_pdf_data_worker(
+        "tests/test_1.pdf",
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES["lines"],
+        TEXT_EXTRACTION_STRATEGIES["text_only"],
+        "raise_on_error",
+        "Local",
+    )
+    expected: dict = deepcopy(FILE_1_RESULT_INPUT)
+    for expected_page in expected["pages"]:
+        expected_page["tables"] = []
+    assert {key: result[key] for key in ("metadata", "pages")} == expected
+    assert result["stats"]["table_detection_skipped"] == len(result["pages"])
+
+
+@pytest.mark.parametrize("filename", ["tests/test_1.pdf", "tests/test_2.pdf", "tests/test_3.pdf"])
+def test_engine_parity(filename: str) -> None:
+    """Test that the PDFium engine extracts the metadata and default text of pdfplumber"""
+    with PdfplumberDocument(filename) as expected, PdfiumDocument(filename) as document:
+        assert document.metadata == expected.metadata
+        assert document.page_count == expected.page_count
+        for page_number in range(1, expected.page_count + 1):
+            expected_page = expected.page(page_number)
+            page = document.page(page_number)
+            assert page.extract_text() == expected_page.extract_text(
+                **deepcopy(TEXT_EXTRACTION_STRATEGIES["default"])
+            )
+            assert page.extract_tables(TABLE_EXTRACTION_STRATEGIES["lines"]) == []
+            assert page.table_detection_skipped
+            page.close()
+            expected_page.close()
+
+
+def test_pdfium_engine() -> None:
+    """Test the extraction with the PDFium engine from all sources and executor backends"""
+    expected: dict = deepcopy(FILE_1_RESULT_INPUT)
+    for expected_page in expected["pages"]:
+        expected_page["tables"] = []
+    result = PdfExtract.extract_pdf_data_worker(
+        "tests/test_1.pdf",
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES["lines"],
+        TEXT_EXTRACTION_STRATEGIES["default"],
+        "raise_on_error",
+        "Local",
+        engine="pdfium",
+    )
+    assert {key: result[key] for key in ("metadata", "pages")} == expected
+    assert result["stats"]["table_detection_skipped"] == len(result["pages"])
+
+    pages, _, _ = PdfExtract.extract_pdf_pages_worker(
+        Path("tests/test_1.pdf").read_bytes(),
+        "test_1.pdf",
+        [1, 2],
+        TABLE_EXTRACTION_STRATEGIES["lines"],
+        TEXT_EXTRACTION_STRATEGIES["default"],
+        "raise_on_error",
+        engine="pdfium",
+    )
+    assert pages == expected["pages"]
+
+    filenames = ["tests/test_1.pdf", "tests/test_2.pdf", "tests/test_3.pdf"] * 2
+    for executor_backend in ("threads", "processes"):
+        plugin = PdfExtract(
+            regex="", engine="pdfium", executor_backend=executor_backend, max_processes=3
+        )
+        plugin.context = TestLocalExecutionContext()
+        entities = plugin.get_entities(filenames, ["Local"] * len(filenames)).entities
+        results = [literal_eval(entity.values[0][0]) for entity in entities]
+        assert sorted(len(_["pages"]) for _ in results) == [2, 2, 2, 2, 5, 5]
+
+
+def test_invalid_engine() -> None:
+    """Test invalid extraction engine"""
+    with pytest.raises(ValueError, match="Invalid extraction engine: wrong"):
+        PdfExtract(regex="test", engine="wrong")
+
+
+@pytest.mark.parametrize("table_strategy", ["lines", "text"])
+def test_table_pre_detection(tmp_path: Path, table_strategy: str) -> None:
+    """Test that the table detection is skipped on pages without tables"""
+    source = pdfium.PdfDocument("tests/test_1.pdf")
+    document = pdfium.PdfDocument.new()
+    document.import_pages(source)
+    document.new_page(595, 842)
+    path = tmp_path / "blank.pdf"
+    document.save(path)
+
+    with pdfplumber_open(path) as pdf:
+        extractor = PageExtractor(pdf.pages[2])
+        assert extractor.extract_tables(TABLE_EXTRACTION_STRATEGIES[table_strategy]) == []
+        assert extractor.table_detection_skipped
+        extractor = PageExtractor(pdf.pages[0])
+        assert extractor.extract_tables(TABLE_EXTRACTION_STRATEGIES[table_strategy])
+        assert not extractor.table_detection_skipped
+
+    reports: list = []
+    plugin = PdfExtract(regex="", table_strategy=table_strategy, max_processes=2)
+    plugin.context = TestLocalExecutionContext()
+    plugin.context.report.update = reports.append  # type: ignore[method-assign]
+    entities = list(plugin.get_entities([str(path)], ["Local"]).entities)
+    result = literal_eval(entities[0].values[0][0])
+    assert "stats" not in result
+    assert "page_times" not in result
+    assert result["pages"][2]["tables"] == []
+    assert reports[-1].summary[:2] == [
+        ("Pages processed", "3"),
+        ("Pages with table detection skipped", "1"),
+    ]
+
+
+@pytest.mark.parametrize("table_strategy", ["text", "sparse"])
+def test_table_pre_detection_text(tmp_path: Path, table_strategy: str) -> None:
+    """Test that the text strategies only skip pages on which pdfplumber finds no table"""
+    random = Random(0)  # noqa: S311
+    # a borderless table of numbers with gaps of about 8 points between the columns
+    numbers = text_lines(
+        [
+            (50 + 47 * column, PAGE_HEIGHT - 100 - 14 * row, f"{random.uniform(1000, 9999):.2f}")
+            for row in range(12)
+            for column in range(6)
+        ]
+    )
+    path = tmp_path / "text.pdf"
+    path.write_bytes(
+        build_pdf(
+            [
+                (paragraph_page(random), None),
+                (numbers, None),
+                ("", None),
+            ]
+        )
+    )
+
+    settings = TABLE_EXTRACTION_STRATEGIES[table_strategy]
+    with pdfplumber_open(path) as pdf:
+        for page, skipped in zip(pdf.pages, (False, False, True), strict=True):
+            extractor = PageExtractor(page)
+            assert extractor.extract_tables(settings) == page.extract_tables(settings)
+            assert extractor.table_detection_skipped == skipped
+        assert PageExtractor(pdf.pages[1]).extract_tables(settings)
+
+
+def test_timing_statistics() -> None:
+    """Test the phase timings, throughputs and slowest files and pages in the report"""
+    result = PdfExtract.extract_pdf_data_worker(
+        "tests/test_1.pdf",
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES["lines"],
+        TEXT_EXTRACTION_STRATEGIES["default"],
+        "raise_on_error",
+        "Local",
+    )
+    stats = result["stats"]
+    assert list(result["page_times"]) == [page["page_number"] for page in result["pages"]]
+    assert stats["bytes"] == Path("tests/test_1.pdf").stat().st_size
+    for key in ("time_file", "time_download", "time_open", "time_text", "time_tables"):
+        assert stats[key] > 0
+    assert stats["time_file"] > sum(result["page_times"].values())
+
+    reports: list = []
+    plugin = PdfExtract(regex="", max_processes=2)
+    plugin.context = TestLocalExecutionContext()
+    plugin.context.report.update = reports.append  # type: ignore[method-assign]
+    filenames = ["tests/test_1.pdf", "tests/test_2.pdf", "tests/test_3.pdf"]
+    list(plugin.get_entities(filenames, ["Local"] * 3).entities)
+    summary = dict(reports[-1].summary)
+    assert summary["Bytes read"] == str(sum(Path(_).stat().st_size for _ in filenames))
+    for label in (
+        "Download time (s)",
+        "Open time (s)",
+        "Text extraction time (s)",
+        "Table extraction time (s)",
+        "Serialization time (s)",
+        "Pages per second",
+        "Bytes per second",
+    ):
+        assert float(summary[label]) >= 0
+    assert float(summary["Pages per second"]) > 0
+    slowest_files = [_.split(" (")[0] for _ in summary["Slowest files"].split(", ")]
+    assert sorted(slowest_files) == filenames
+    slowest_pages = summary["Slowest pages"].split(", ")
+    assert len(slowest_pages) == 5  # noqa: PLR2004
+    assert all(" page " in _ for _ in slowest_pages)
+
+
+def test_benchmark_corpus(tmp_path: Path) -> None:
+    """Test that the benchmark corpus is generated and measured as intended"""
+    paths = {_.stem: _ for _ in generate_corpus(tmp_path)}
+    assert list(paths) == [
+        "text_only",
+        "lattice_tables",
+        "sparse_tables",
+        "many_pages",
+        "large_images",
+    ]
+    run = run_worker(str(paths["lattice_tables"]), "default", "lines")
+    assert run["pages"] == 10  # noqa: PLR2004
+    assert run["stats"]["table_detection_skipped"] == 0
+    assert run["peak_rss"] > 0
+    with pdfplumber_open(paths["lattice_tables"]) as pdf:
+        assert len(pdf.pages[0].extract_tables()[0]) == 25  # noqa: PLR2004
+    with pdfplumber_open(paths["large_images"]) as pdf:
+        assert len(pdf.pages[0].images) == 1
+
+
+def test_auto_strategy(tmp_path: Path) -> None:
+    """Test that the strategies are chosen per file from a probe of its pages"""
+    random = Random(0)  # noqa: S311
+    line = "lorem ipsum dolor sit amet consectetur"
+    documents = {
+        "ruled": [table_page(random, rows=5, columns=4, ruled=True)],
+        "borderless": [table_page(random, rows=5, columns=4, ruled=False)],
+        "text": [paragraph_page(random)] * 4,
+        "columns": [
+            text_lines([(x, PAGE_HEIGHT - 50 - 12 * _, line) for _ in range(40) for x in (50, 320)])
+        ],
+        "ocr": [paragraph_page(random).replace("BT ", "BT 3 Tr ")],
+    }
+    expected = {
+        "ruled": ("default", "lines"),
+        "borderless": ("default", "text"),
+        "text": ("text_only", "lines"),
+        "columns": ("layout", "lines"),
+        "ocr": ("scanned", "lines"),
+    }
+    filenames = []
+    for name, pages in documents.items():
+        path = tmp_path / f"{name}.pdf"
+        path.write_bytes(build_pdf([(_, None) for _ in pages]))
+        filenames.append(str(path))
+
+    plugin = PdfExtract(regex="", text_strategy="auto", table_strategy="auto", max_processes=2)
+    plugin.context = TestLocalExecutionContext()
+    for entity in plugin.get_entities(filenames, ["Local"] * len(filenames)).entities:
+        result = literal_eval(entity.values[0][0])
+        metadata = result["metadata"]
+        name = Path(metadata["Filename"]).stem
+        assert (metadata["text_strategy"], metadata["table_strategy"]) == expected[name]
+        assert bool(result["pages"][0]["tables"]) == (name in ("ruled", "borderless"))
+
+    result = PdfExtract.extract_pdf_data_worker(
+        filenames[0],
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES["lattice"],
+        plugin.text_strategy,
+        "raise_on_error",
+        "Local",
+    )
+    assert result["metadata"]["text_strategy"] == "default"
+    assert "table_strategy" not in result["metadata"]
+    assert result["stats"]["time_probe"] > 0
+
+    plugin.page_chunk_size = 1
+    result = literal_eval(
+        next(plugin.get_entities(filenames[2:3], ["Local"]).entities).values[0][0]
+    )
+    assert (result["metadata"]["text_strategy"], result["metadata"]["table_strategy"]) == (
+        "text_only",
+        "lines",
+    )
+    assert len(result["pages"]) == 4  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("engine", "text_strategy"),
+    [("pdfplumber", "default"), ("pdfplumber", "text_only"), ("pdfium", "default")],
+)
+def test_image_only_pages(tmp_path: Path, engine: str, text_strategy: str) -> None:
+    """Test that image-only pages are marked and counted without extracting them"""
+    content, image = image_page(Random(0), size=200)  # noqa: S311
+    scan = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q\n"
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(build_pdf([(scan, image), (content, image), (scan, image)]))
+
+    result = PdfExtract.extract_pdf_data_worker(
+        str(path),
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES["lines"],
+        TEXT_EXTRACTION_STRATEGIES[text_strategy],
+        "raise_on_error_and_warning",
+        "Local",
+        engine=engine,
+    )
+    assert result["metadata"]["image_only_pages"] == 2  # noqa: PLR2004
+    assert result["stats"]["image_only_pages"] == 2  # noqa: PLR2004
+    assert result["stats"]["pages"] == 3  # noqa: PLR2004
+    scanned = {"page_number": 1, "text": "", "tables": [], "image_only": True}
+    assert result["pages"][0] == scanned
+    assert result["pages"][2] == {**scanned, "page_number": 3}
+    assert result["pages"][1]["text"]
+    assert "image_only" not in result["pages"][1]
+
+    result = PdfExtract.extract_pdf_data_worker(
+        "tests/test_1.pdf",
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES["lines"],
+        TEXT_EXTRACTION_STRATEGIES[text_strategy],
+        "raise_on_error",
+        "Local",
+        engine=engine,
+    )
+    assert "image_only_pages" not in result["metadata"]
+
+
+def test_image_only_check_warnings(tmp_path: Path) -> None:
+    """Test that pdfminer warnings of the image-only check are recorded for the page"""
+    _, image = image_page(Random(0), size=200)  # noqa: S311
+    scan = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q\n"
+    path = tmp_path / "warning.pdf"
+    path.write_bytes(build_pdf([("(a) w\n", None), (f"(a) w\n{scan}", image)]))
+    warning = "Text extraction error: Cannot set line width because b'a' is an invalid float value"
+
+    result = PdfExtract.extract_pdf_data_worker(
+        str(path),
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES["lines"],
+        TEXT_EXTRACTION_STRATEGIES["default"],
+        "raise_on_error",
+        "Local",
+    )
+    assert result["pages"] == [
+        {"page_number": 1, "text": "", "tables": [], "error": warning},
+        {"page_number": 2, "text": "", "tables": [], "image_only": True, "error": warning},
+    ]
+
+    with pytest.raises(ValueError, match=f"File {path}, page 1: {re.escape(warning)}"):
+        PdfExtract.extract_pdf_data_worker(
+            str(path),
+            [],
+            "",
+            TABLE_EXTRACTION_STRATEGIES["lines"],
+            TEXT_EXTRACTION_STRATEGIES["default"],
+            "raise_on_error_and_warning",
+            "Local",
+        )
+
+
+def fake_tesseract(directory: Path, exit_code: int = 0, release: Path | None = None) -> None:
+    """Write a script that answers like Tesseract as "tesseract" to the directory
+
+    If a release path is given, the script only answers once the path exists.
+    """
+    directory.mkdir(exist_ok=True)
+    path = directory / "tesseract"
+    wait_for_release = (
+        "import os, time\n"
+        "for _ in range(300):\n"
+        f"    if os.path.exists({str(release)!r}):\n"
+        "        break\n"
+        "    time.sleep(0.1)\n"
+        "else:\n"
+        "    sys.exit('Not released')\n"
+        if release
+        else ""
+    )
+    path.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        f"{wait_for_release}"
+        "with open(sys.argv[1], 'rb') as f:\n"
+        "    assert f.read().startswith(b'\\x89PNG')\n"
+        f"if {exit_code}:\n"
+        "    sys.exit('Error opening data file')\n"
+        "print('Recognized  \\ntext \\n\\f')\n"
+    )
+    path.chmod(0o755)
+
+
+def test_ocr(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the text of image-only pages is recognized and cached by page content"""
+    content, image = image_page(Random(0), size=200)  # noqa: S311
+    scan = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q\n"
+    paths = [tmp_path / "scan.pdf", tmp_path / "other.pdf"]
+    paths[0].write_bytes(build_pdf([(scan, image), (content, image)]))
+    paths[1].write_bytes(build_pdf([(content, image), (scan, image)]))
+
+    result = PdfExtract.extract_pdf_data_worker(
+        str(paths[0]),
+        [],
+        "",
+        TABLE_EXTRACTION_STRATEGIES["lines"],
+        TEXT_EXTRACTION_STRATEGIES["default"],
+        "raise_on_error",
+        "Local",
+        ocr_language="eng",
+        ocr_directory=str(tmp_path),
+    )
+    assert list(result["ocr"]["images"]) == [1]
+    image_path = Path(result["ocr"]["images"][1])
+    assert image_path.parent == tmp_path
+    assert image_path.read_bytes().startswith(b"\x89PNG")
+    assert result["stats"]["time_render"] > 0
+
+    fake_tesseract(tmp_path / "bin")
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    plugin = PdfExtract(
+        regex="",
+        cache_directory=str(tmp_path / "cache"),
+        ocr=True,
+        max_processes=1,
+    )
+    plugin.context = TestLocalExecutionContext()
+    reports: list = []
+    plugin.context.report.update = reports.append  # type: ignore[method-assign]
+    entities = list(plugin.get_entities([str(paths[0])], ["Local"]).entities)
+    result = literal_eval(entities[0].values[0][0])
+    assert "ocr" not in result
+    assert result["pages"][0] == {
+        "page_number": 1,
+        "text": "Recognized\ntext",
+        "tables": [],
+        "image_only": True,
+        "ocr": True,
+    }
+    assert "ocr" not in result["pages"][1]
+    assert ("Pages recognized by OCR", "1") in reports[-1].summary
+    assert plugin.ocr_directory is not None
+    assert not Path(plugin.ocr_directory).exists()
+
+    # the text of the same scanned page in another file is taken from the cache
+    fake_tesseract(tmp_path / "bin", exit_code=1)
+    result = literal_eval(
+        next(plugin.get_entities([str(paths[1])], ["Local"]).entities).values[0][0]
+    )
+    assert result["pages"][1]["text"] == "Recognized\ntext"
+
+    plugin.cache = None
+    with pytest.raises(RuntimeError, match="OCR failed with exit code 1: Error opening data file"):
+        list(plugin.get_entities([str(paths[1])], ["Local"]).entities)
+    plugin.error_handling = "ignore"
+    result = literal_eval(
+        next(plugin.get_entities([str(paths[1])], ["Local"]).entities).values[0][0]
+    )
+    assert result["pages"][1]["error"] == "OCR failed with exit code 1: Error opening data file"
+    assert result["pages"][1]["text"] == ""
+
+    plugin.page_chunk_size = 1
+    fake_tesseract(tmp_path / "bin")
+    result = literal_eval(
+        next(plugin.get_entities([str(paths[1])], ["Local"]).entities).values[0][0]
+    )
+    assert result["pages"][1]["text"] == "Recognized\ntext"
+
+    with pytest.raises(ValueError, match="Invalid OCR language: eng deu"):
+        PdfExtract(regex="test", ocr=True, ocr_language="eng deu")
+    with pytest.raises(ValueError, match="Invalid maximum number of OCR processes: 0"):
+        PdfExtract(regex="test", ocr=True, ocr_processes=0)
+
+
+def test_ocr_does_not_hold_up_extraction(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that later files are extracted and output while an earlier file is recognized"""
+    content, image = image_page(Random(0), size=200)  # noqa: S311
+    scan = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q\n"
+    paths = [tmp_path / "scan.pdf", tmp_path / "text1.pdf", tmp_path / "text2.pdf"]
+    paths[0].write_bytes(build_pdf([(scan, image)]))
+    for path in paths[1:]:
+        path.write_bytes(build_pdf([(content, image)]))
+    release = tmp_path / "release"
+    fake_tesseract(tmp_path / "bin", release=release)
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+
+    # a single file in flight, so that the next file is only extracted once the scan is out
+    plugin = PdfExtract(regex="", ocr=True, max_processes=1, max_files_in_flight=1)
+    plugin.context = TestLocalExecutionContext()
+    entities = plugin.get_entities([str(_) for _ in paths], ["Local"] * len(paths)).entities
+    results = [literal_eval(next(entities).values[0][0]) for _ in paths[1:]]
+    assert [_["metadata"]["Filename"] for _ in results] == [str(_) for _ in paths[1:]]
+
+    release.touch()
+    result = literal_eval(next(entities).values[0][0])
+    assert result["metadata"]["Filename"] == str(paths[0])
+    assert result["pages"][0]["text"] == "Recognized\ntext"
+    assert not list(entities)
+
+    # in ordered mode, the later files are extracted but wait for the scan to be output
+    release.unlink()
+    plugin.ordered_output = True
+    plugin.max_files_in_flight = 2
+    entities = plugin.get_entities([str(_) for _ in paths], ["Local"] * len(paths)).entities
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first = executor.submit(next, entities)
+        sleep(1)
+        assert not first.done()
+        release.touch()
+        result = literal_eval(first.result().values[0][0])
+    assert result["metadata"]["Filename"] == str(paths[0])
+    assert [literal_eval(_.values[0][0])["metadata"]["Filename"] for _ in entities] == [
+        str(_) for _ in paths[1:]
+    ]
+
+
+def test_capture_pdfminer_logs_concurrently() -> None:
+    """Test that pdfminer logs are captured by the thread that logged them"""
+    logger = logging.getLogger("pdfminer.test")
+    barrier = Barrier(4)
+
+    def capture(name: str) -> str:
+        with capture_pdfminer_logs() as stderr:
+            barrier.wait()
+            logger.warning(name)
+            barrier.wait()
+            logger.info(name)
+        return str(stderr.getvalue())
+
+    names = [f"thread {_}" for _ in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(capture, names)) == [f"{_}\n" for _ in names]
+
+    with capture_pdfminer_logs():
+        pass
+    assert logging.getLogger("pdfminer").handlers.count(pdfminer_log_handler) == 1
+
+
+def test_capture_pdfminer_logs_restores_level() -> None:
+    """Test that the level of the shared pdfminer logger is only lowered while capturing"""
+    logger = logging.getLogger("pdfminer")
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    try:
+        with capture_pdfminer_logs() as stderr:
+            with capture_pdfminer_logs():
+                pass
+            logging.getLogger("pdfminer.test").warning("captured")
+        assert stderr.getvalue() == "captured\n"
+        assert logger.level == logging.ERROR
+    finally:
+        logger.setLevel(level)
+
+
+@pytest.mark.parametrize("all_files", ["no_combine", "combine"])
+def test_output_format(all_files: str) -> None:
+    """Test the JSON and JSON Lines output formats against the Python literal output"""
+    filenames = ["tests/test_1.pdf", "tests/test_2.pdf"]
+    values = {}
+    for output_format in ("python", "json", "jsonl"):
+        plugin = PdfExtract(
+            regex="", all_files=all_files, output_format=output_format, max_processes=2
+        )
+        plugin.context = TestLocalExecutionContext()
+        entities = plugin.get_entities(filenames, ["Local", "Local"]).entities
+        values[output_format] = [entity.values[0][0] for entity in entities]
+
+    expected = [literal_eval(_) for _ in values["python"]]
+    assert [json.loads(_) for _ in values["json"]] == expected
+
+    results = expected[0] if all_files == "combine" else expected
+    assert [json.loads(line) for _ in values["jsonl"] for line in _.splitlines()] == [
+        line
+        for result in results
+        for line in (
+            {"metadata": result["metadata"]},
+            *({"Filename": result["metadata"]["Filename"], **page} for page in result["pages"]),
+        )
+    ]
+
+
+def test_invalid_output_format() -> None:
+    """Test invalid output format"""
+    with pytest.raises(ValueError, match="Invalid output format: xml"):
+        PdfExtract(regex="test", output_format="xml")
+
+
+@pytest.mark.parametrize("output_format", ["python", "json"])
+def test_page_output_mode(tmp_path: Path, output_format: str) -> None:
+    """Test the output of one entity per page"""
+    plugin = PdfExtract(
+        regex="",
+        output_mode="page",
+        output_format=output_format,
+        error_handling="ignore",
+        max_processes=2,
+    )
+    plugin.context = TestLocalExecutionContext()
+    entities = plugin.get_entities(["tests/test_1.pdf"], ["Local"])
+    assert [_.path for _ in entities.schema.paths] == [
+        "filename",
+        "page_number",
+        "text",
+        "tables",
+        "error",
+    ]
+
+    pages = PdfExtract.extract_pdf_data_worker(
+        "tests/test_1.pdf",
+        [],
+        "",
+        plugin.table_strategy,
+        plugin.text_strategy,
+        plugin.error_handling,
+        "Local",
+    )["pages"]
+    parse = literal_eval if output_format == "python" else json.loads
+    output = list(entities.entities)
+    assert [entity.uri for entity in output] == [
+        f"{TYPE_URI}_Local_tests%2Ftest_1.pdf_{page['page_number']}" for page in pages
+    ]
+    values = [entity.values for entity in output]
+    assert values == [
+        [["tests/test_1.pdf"], [str(page["page_number"])], [page["text"]], [ANY], []]
+        for page in pages
+    ]
+    assert [parse(_[3][0]) for _ in values] == [page["tables"] for page in pages]
+
+    path = tmp_path / "invalid.pdf"
+    path.write_bytes(b"no pdf")
+    entities = plugin.get_entities([str(path)], ["Local"])
+    assert [entity.values for entity in entities.entities] == [
+        [[str(path)], [], [], [], [ANY]],
+    ]
+
+
+def test_page_output_mode_combine() -> None:
+    """Test that results cannot be combined with one entity per page"""
+    with pytest.raises(ValueError, match="Results can only be combined with one entity per file"):
+        PdfExtract(regex="test", all_files="combine", output_mode="page")
+
+
+def test_table_row_output_mode() -> None:
+    """Test the output of one entity per table row"""
+    plugin = PdfExtract(regex="", output_mode="table_row", table_columns=3, max_processes=2)
+    plugin.context = TestLocalExecutionContext()
+    entities = plugin.get_entities(["tests/test_1.pdf"], ["Local"])
+    assert [_.path for _ in entities.schema.paths] == [
+        "filename",
+        "page_number",
+        "table_index",
+        "row_index",
+        "cells",
+        "col_1",
+        "col_2",
+        "col_3",
+    ]
+
+    pages = PdfExtract.extract_pdf_data_worker(
+        "tests/test_1.pdf",
+        [],
+        "",
+        plugin.table_strategy,
+        plugin.text_strategy,
+        plugin.error_handling,
+        "Local",
+    )["pages"]
+    expected = [
+        [
+            ["tests/test_1.pdf"],
+            [str(page["page_number"])],
+            [str(table_index)],
+            [str(row_index)],
+            [str(row)],
+            *([] if cell is None else [cell] for cell in row[:3]),
+        ]
+        for page in pages
+        for table_index, table in enumerate(page["tables"], start=1)
+        for row_index, row in enumerate(table, start=1)
+    ]
+    assert expected
+    assert [entity.values for entity in entities.entities] == expected
+
+
+def test_invalid_table_columns() -> None:
+    """Test invalid number of table columns"""
+    with pytest.raises(ValueError, match="Invalid number of table columns: 0"):
+        PdfExtract(regex="test", output_mode="table_row", table_columns=0)
+
+
+def test_spooled_output() -> None:
+    """Test that spooled combined results equal the serialization of the list of results"""
+    results = [
+        PdfExtract.extract_pdf_data_worker(
+            filename,
+            [],
+            "",
+            TABLE_EXTRACTION_STRATEGIES["lines"],
+            TEXT_EXTRACTION_STRATEGIES["default"],
+            "raise_on_error",
+            "Local",
+        )
+        for filename in ("tests/test_1.pdf", "tests/test_2.pdf")
+    ]
+    for result in results:
+        result.pop("stats")
+        result.pop("page_times")
+
+    output = SpooledOutput(str, "[", ", ", "]", max_size=1000)
+    for result in results:
+        output.write(result)
+    assert output.file._rolled  # type: ignore[attr-defined]  # noqa: SLF001
+    assert output.getvalue() == str(results)
+    output.close()
+
+    output = SpooledOutput(lambda _: "".join(iter_json_lines([_])))
+    for result in results:
+        output.write(result)
+    assert output.getvalue() == "".join(iter_json_lines(results))
+    output.close()
+
+
+def test_output_resource(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test writing the results to a project resource"""
+    uploads = {}
+
+    def create_resource(
+        project_name: str, resource_name: str, file_resource: BytesIO, replace: bool
+    ) -> None:
+        assert replace
+        uploads[(project_name, resource_name)] = file_resource.read()
+
+    monkeypatch.setattr("cmem_plugin_pdf_extract.output.create_resource", create_resource)
+
+    plugin = PdfExtract(
+        regex="", output_resource="results.jsonl", page_selection="1-3", max_processes=2
+    )
+    plugin.context = TestLocalExecutionContext()
+    entities = plugin.get_entities(["tests/test_1.pdf", "tests/test_2.pdf"], ["Local", "Local"])
+    assert [_.path for _ in entities.schema.paths] == [
+        "output_resource",
+        "files",
+        "pages",
+        "errors",
+    ]
+    assert [entity.values for entity in entities.entities] == [
+        [["results.jsonl"], ["2"], ["6"], ["2"]]
+    ]
+
+    lines = [json.loads(_) for _ in uploads[("dummyProject", "results.jsonl")].splitlines()]
+    assert sorted(_["metadata"]["Filename"] for _ in lines if "metadata" in _) == [
+        "tests/test_1.pdf",
+        "tests/test_2.pdf",
+    ]
+    assert sorted((_["Filename"], _["page_number"]) for _ in lines if "metadata" not in _) == [
+        (filename, page_number)
+        for filename in ("tests/test_1.pdf", "tests/test_2.pdf")
+        for page_number in (1, 2, 3)
+    ]
+
+    # combined results are written to the output file as well, instead of a single value
+    plugin = PdfExtract(
+        regex="", all_files="combine", output_resource="combined.jsonl", max_processes=2
+    )
+    plugin.context = TestLocalExecutionContext()
+    entities = plugin.get_entities(["tests/test_1.pdf", "tests/test_2.pdf"], ["Local", "Local"])
+    assert [entity.values for entity in entities.entities] == [
+        [["combined.jsonl"], ["2"], ["4"], ["0"]]
+    ]
+    assert uploads[("dummyProject", "combined.jsonl")].count(b"\n") == 6  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("resource_name", ["tables.parquet", "tables.arrow"])
+def test_table_output_resource(monkeypatch: pytest.MonkeyPatch, resource_name: str) -> None:
+    """Test writing the table rows to a Parquet or Arrow project resource"""
+    pa = pytest.importorskip("pyarrow")
+    uploads = {}
+
+    def create_resource(
+        project_name: str, resource_name: str, file_resource: BytesIO, replace: bool
+    ) -> None:
+        assert replace
+        uploads[(project_name, resource_name)] = file_resource.read()
+
+    monkeypatch.setattr("cmem_plugin_pdf_extract.output.create_resource", create_resource)
+
+    plugin = PdfExtract(regex="", output_resource=resource_name, max_processes=2)
+    plugin.context = TestLocalExecutionContext()
+    entities = plugin.get_entities(["tests/test_1.pdf"], ["Local"])
+    assert [entity.values for entity in entities.entities] == [
+        [[resource_name], ["1"], ["2"], ["0"]]
+    ]
+
+    buffer = pa.BufferReader(uploads[("dummyProject", resource_name)])
+    if resource_name.endswith(".parquet"):
+        table = pytest.importorskip("pyarrow.parquet").read_table(buffer)
+    else:
+        table = pa.ipc.open_file(buffer).read_all()
+    assert table.column_names == ["file", "page", "table_idx", "row_idx", "cells"]
+
+    pages = PdfExtract.extract_pdf_data_worker(
+        "tests/test_1.pdf",
+        [],
+        "",
+        plugin.table_strategy,
+        plugin.text_strategy,
+        plugin.error_handling,
+        "Local",
+    )["pages"]
+    assert table.to_pylist() == [
+        {
+            "file": "tests/test_1.pdf",
+            "page": page["page_number"],
+            "table_idx": table_idx,
+            "row_idx": row_idx,
+            "cells": row,
+        }
+        for page in pages
+        for table_idx, rows in enumerate(page["tables"], start=1)
+        for row_idx, row in enumerate(rows, start=1)
+    ]
@@ -4,6 +4,9 @@ Remove this and other example files after bootstrapping your project.
 """
 
 import os
+from collections.abc import Iterator
+from functools import partial
+from io import BytesIO
 from typing import ClassVar
 
 import pytest
@@ -72,3 +75,23 @@ class TestExecutionContext(ExecutionContext):
         self.report = ReportContext()
         self.task = TestTaskContext(project_id=project_id, task_id=task_id)
         self.user = TestUserContext()
+
+
+class TestLocalExecutionContext(ExecutionContext):
+    """dummy execution context without user access, sufficient for local files"""
+
+    __test__ = False
+
+    def __init__(self, project_id: str = "dummyProject", task_id: str = "dummyTask"):
+        self.report = ReportContext()
+        self.task = TestTaskContext(project_id=project_id, task_id=task_id)
+
+
+class TestResourceResponse(BytesIO):
+    """dummy streamable response of a project resource"""
+
+    __test__ = False
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        """Iterate over the content in chunks"""
+        return iter(partial(self.read, chunk_size), b"")